@@ -6,6 +6,7 @@ from backend.api.v1.dataset import router as dataset_router
 from backend.api.v1.embedding import router as embedding_router
 from backend.api.v1.evaluation import router as evaluation_router
 from backend.api.v1.health import router as health_router
+from backend.api.v1.jobs import router as jobs_router
 from backend.api.v1.results import router as results_router
 from backend.api.v1.system import router as system_router
 
@@ -17,3 +18,4 @@ api_router.include_router(embedding_router, prefix="/embedding", tags=["embeddin
 api_router.include_router(evaluation_router, prefix="/evaluation", tags=["evaluation"])
 api_router.include_router(results_router, prefix="/results", tags=["results"])
 api_router.include_router(system_router, prefix="/system", tags=["system"])
+api_router.include_router(jobs_router, prefix="/jobs", tags=["jobs"])
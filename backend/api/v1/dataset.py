@@ -9,7 +9,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from backend.core.database import get_db
 from backend.models import database as models
 from backend.models.schemas import DatasetIngestRequest
+from backend.services.corpus_service import CorpusService
 from backend.services.dataset_ingestion import DatasetIngestionService
+from backend.services.job_queue import JobQueue
 
 router = APIRouter()
 
@@ -42,16 +44,12 @@ async def get_status(db: AsyncSession = Depends(get_db)) -> dict:
 async def ingest_dataset(
     request: DatasetIngestRequest, db: AsyncSession = Depends(get_db)
 ) -> dict:
-    service = DatasetIngestionService(db)
-    try:
-        result = await service.ingest(request.subset)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    job = await JobQueue(db).enqueue("ingestion", {"subset": request.subset})
+    await db.commit()
     return {
-        "status": "downloading",
-        "message": "Dataset ingestion started",
-        "job_id": "dataset_ingest_1",
-        "result": result,
+        "status": "queued",
+        "message": "Dataset ingestion queued",
+        "job_id": job.id,
     }
 
 
@@ -89,18 +87,13 @@ async def get_queries(
 async def get_corpus(
     doc_id: str, section_id: int, db: AsyncSession = Depends(get_db)
 ) -> dict:
-    result = await db.execute(
-        select(models.Corpus).where(
-            models.Corpus.doc_id == doc_id, models.Corpus.section_id == section_id
-        )
-    )
-    row = result.scalar_one_or_none()
-    if row is None:
+    section = await CorpusService(db).fetch_section(doc_id, section_id)
+    if section is None:
         raise HTTPException(status_code=404, detail="Corpus section not found")
     return {
-        "doc_id": row.doc_id,
-        "section_id": row.section_id,
-        "section_text": row.section_text,
-        "tables_markdown": row.tables_markdown,
-        "has_images": row.has_images,
+        "doc_id": section["doc_id"],
+        "section_id": section["section_id"],
+        "section_text": section["text"],
+        "tables_markdown": section["tables_markdown"],
+        "has_images": section["has_images"],
     }
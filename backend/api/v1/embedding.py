@@ -1,24 +1,37 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import delete, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.config import settings
 from backend.core.database import get_db
 from backend.core.model_manager import ModelManager
 from backend.models import database as models
-from backend.models.schemas import EmbeddingModelCreate, SearchRequest
-from backend.services.embedding_service import EmbeddingService
+from backend.models.schemas import (
+    BackendBenchmarkRequest,
+    BatchSearchRequest,
+    EfSearchSweepRequest,
+    EmbeddingModelCreate,
+    EmbeddingResumeRequest,
+    SearchBackendUpdate,
+    SearchRequest,
+)
+from backend.services.dimensionality import stored_dimension, validate_reduction
+from backend.services.job_queue import JobQueue
 from backend.services.retrieval_pipeline import RetrievalPipeline
-from backend.services.retrieval_service import RetrievalService
+from backend.services.retrieval_service import VECTOR_STORAGES, RetrievalService
+from backend.services.search_benchmark import SearchBenchmarkService
 from backend.services.reranker_service import RerankerService
-from backend.services.vector_storage import VectorStorage, VectorRow
-
-
-def _hash_api_key(api_key: str) -> str:
-    return api_key[-4:]
+from backend.services.vector_backend import (
+    SEARCH_BACKENDS,
+    PgVectorBackend,
+    get_vector_backend,
+    remove_local_indexes,
+)
+from backend.services.vector_storage import IndexParams
 
 router = APIRouter()
 
@@ -35,7 +48,16 @@ async def list_models(db: AsyncSession = Depends(get_db)) -> dict:
                 "model_source": row.model_source,
                 "dimension": row.dimension,
                 "status": row.status,
+                "search_backend": row.config.get("search_backend", "pgvector"),
+                "vector_storage": row.config.get("vector_storage", "vector"),
+                "reduction": row.config.get("reduction"),
+                "stored_dimension": stored_dimension(row),
+                "parent_model_id": row.parent_model_id,
                 "total_vectors": row.total_vectors,
+                "last_corpus_id": row.last_corpus_id,
+                "job_stats": row.job_stats,
+                "index_build_seconds": row.index_build_seconds,
+                "index_size_bytes": row.index_size_bytes,
                 "created_at": row.created_at.isoformat() if row.created_at else None,
             }
             for row in models_list
@@ -45,10 +67,23 @@ async def list_models(db: AsyncSession = Depends(get_db)) -> dict:
 
 @router.post("/models")
 async def create_model(
-    request: EmbeddingModelCreate, background: BackgroundTasks, db: AsyncSession = Depends(get_db)
+    request: EmbeddingModelCreate, db: AsyncSession = Depends(get_db)
 ) -> dict:
-    manager = ModelManager()
-    embedding_service = EmbeddingService(manager)
+    _check_openai_key(request.model_source.value, request.api_key)
+    # Each variant is a reduced copy of the model filled from the same
+    # encode pass, e.g. {"reduction": "truncate", "reduced_dimension": 256}.
+    base_config = {key: value for key, value in request.config.items() if key != "variants"}
+    variant_configs = [{**base_config, **variant} for variant in request.config.get("variants", [])]
+    for config in [request.config, *variant_configs]:
+        if config.get("search_backend", "pgvector") not in SEARCH_BACKENDS:
+            raise HTTPException(status_code=400, detail="Unknown search backend")
+        if config.get("vector_storage", "vector") not in VECTOR_STORAGES:
+            raise HTTPException(status_code=400, detail="Unknown vector storage")
+        try:
+            IndexParams.from_config(config)
+            validate_reduction(config, request.dimension)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     model_entry = models.EmbeddingModel(
         model_name=request.model_name,
@@ -61,75 +96,103 @@ async def create_model(
     db.add(model_entry)
     await db.flush()
 
-    storage = VectorStorage(db)
-    table_name = await storage.create_vector_table(model_entry.id, request.dimension)
-    model_entry.table_name = table_name
+    await PgVectorBackend(db, model_entry).create()
+    table_name = model_entry.table_name
+    variant_ids = []
+    for config in variant_configs:
+        variant = models.EmbeddingModel(
+            model_name=request.model_name,
+            model_source=request.model_source.value,
+            dimension=request.dimension,
+            table_name="",
+            config=config,
+            status="embedding",
+            parent_model_id=model_entry.id,
+        )
+        db.add(variant)
+        await db.flush()
+        await PgVectorBackend(db, variant).create()
+        variant_ids.append(variant.id)
+    job = await JobQueue(db).enqueue(
+        "embedding",
+        {
+            "request": request.model_dump(mode="json", exclude={"api_key"}),
+            "model_id": model_entry.id,
+            "resume": False,
+        },
+    )
     await db.commit()
 
-    background.add_task(run_embedding, request, model_entry.id, db)
-
     return {
         "id": model_entry.id,
+        "job_id": job.id,
         "status": "embedding",
-        "message": "Embedding started",
+        "message": "Embedding queued",
         "table_name": table_name,
+        "variant_ids": variant_ids,
     }
 
 
-async def run_embedding(request: EmbeddingModelCreate, model_id: int, db: AsyncSession) -> None:
-    try:
-        manager = ModelManager()
-        embedding_service = EmbeddingService(manager)
-
-        corpus_rows = await db.execute(select(models.Corpus))
-        corpus = corpus_rows.scalars().all()
-        texts = [row.section_text for row in corpus]
-
-        if request.model_source.value == "openai":
-            if not request.api_key:
-                raise ValueError("OpenAI API key required")
-            result = embedding_service.embed_texts_openai(
-                request.model_name, texts, request.api_key, request.config.get("batch_size", 100)
-            )
-            api_key_hash = _hash_api_key(request.api_key)
-        else:
-            result = embedding_service.embed_texts(
-                request.model_name,
-                texts,
-                batch_size=request.config.get("batch_size", 32),
-                normalize=request.config.get("normalize", True),
-            )
-            api_key_hash = None
-
-        vector_rows = [
-            VectorRow(
-                corpus_id=corpus[idx].id,
-                doc_id=corpus[idx].doc_id,
-                section_id=corpus[idx].section_id,
-                embedding=result.embeddings[idx],
-            )
-            for idx in range(len(corpus))
-        ]
-
-        storage = VectorStorage(db)
-        model_result = await db.execute(
-            select(models.EmbeddingModel).where(models.EmbeddingModel.id == model_id)
+@router.post("/models/{model_id}/resume")
+async def resume_model(
+    model_id: int,
+    request: EmbeddingResumeRequest,
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    # The row lock serializes concurrent resumes, so only one of them can
+    # find no active job and enqueue another.
+    result = await db.execute(
+        select(models.EmbeddingModel)
+        .where(models.EmbeddingModel.id == model_id)
+        .with_for_update()
+    )
+    model = result.scalar_one_or_none()
+    if model is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    if model.status == "ready":
+        raise HTTPException(status_code=400, detail="Model is already embedded")
+    active = await JobQueue(db).active_embedding_job(model.id)
+    if active is not None:
+        raise HTTPException(
+            status_code=409, detail=f"Embedding job {active.id} is already {active.status}"
         )
-        model_entry = model_result.scalar_one()
-        inserted = await storage.insert_vectors(model_entry.table_name, vector_rows)
-        model_entry.status = "ready"
-        model_entry.total_vectors = inserted
-        if api_key_hash:
-            model_entry.api_key_hash = api_key_hash
-        await db.commit()
-    except Exception as exc:
-        model_result = await db.execute(
-            select(models.EmbeddingModel).where(models.EmbeddingModel.id == model_id)
+    _check_openai_key(model.model_source, request.api_key)
+
+    job_request = EmbeddingModelCreate(
+        model_name=model.model_name,
+        model_source=model.model_source,
+        dimension=model.dimension,
+        config=model.config,
+    )
+    model.status = "embedding"
+    job = await JobQueue(db).enqueue(
+        "embedding",
+        {
+            "request": job_request.model_dump(mode="json", exclude={"api_key"}),
+            "model_id": model.id,
+            "resume": True,
+        },
+    )
+    await db.commit()
+    return {
+        "id": model.id,
+        "job_id": job.id,
+        "status": "embedding",
+        "message": "Embedding resume queued",
+        "last_corpus_id": model.last_corpus_id,
+    }
+
+
+def _check_openai_key(model_source: str, api_key: Optional[str]) -> None:
+    # Job payloads are stored and listed, so the worker reads the key from
+    # its own environment instead of the request.
+    if api_key:
+        raise HTTPException(
+            status_code=400,
+            detail="Embedding jobs use OPENAI_API_KEY from the server; do not send api_key",
         )
-        model_entry = model_result.scalar_one()
-        model_entry.status = "error"
-        model_entry.error_message = str(exc)
-        await db.commit()
+    if model_source == "openai" and not settings.openai_api_key:
+        raise HTTPException(status_code=400, detail="OPENAI_API_KEY is not configured")
 
 
 @router.get("/models/{model_id}/status")
@@ -147,7 +210,11 @@ async def model_status(model_id: int, db: AsyncSession = Depends(get_db)) -> dic
     await db.execute(delete(models.EmbeddingModel).where(models.EmbeddingModel.id == model_id))
     if table_name:
         await db.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+    await db.execute(text(f"DROP TABLE IF EXISTS query_vectors_{model_id}"))
     await db.commit()
+    # The exact and IVF indexes are files under the table's name; a later
+    # model reusing the id must not find them.
+    await remove_local_indexes(model)
     return {
         "message": "Model and vectors deleted",
         "deleted_vectors": deleted_vectors,
@@ -174,6 +241,8 @@ async def search_embeddings(
         use_reranker=request.use_reranker,
         reranker_model_name=request.reranker_model_name,
         reranker_top_k=request.reranker_top_k,
+        ef_search=request.ef_search,
+        with_payload=True,
     )
 
     results = pipeline_result["retrieved"]
@@ -186,9 +255,131 @@ async def search_embeddings(
                 "doc_id": item["doc_id"],
                 "section_id": item["section_id"],
                 "score": item["score"],
-                "text_preview": "",
+                "text_preview": item.get("text_preview", ""),
+                "section_length": item.get("section_length"),
             }
             for item in results
         ],
         "reranked": reranked,
     }
+
+
+@router.post("/search/batch")
+async def batch_search_embeddings(
+    request: BatchSearchRequest, db: AsyncSession = Depends(get_db)
+) -> dict:
+    result = await db.execute(
+        select(models.EmbeddingModel).where(models.EmbeddingModel.id == request.model_id)
+    )
+    model = result.scalar_one_or_none()
+    if model is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+
+    manager = ModelManager()
+    pipeline = RetrievalPipeline(db, manager)
+    pipeline_results = await pipeline.retrieve_batch(
+        model_id=request.model_id,
+        query_texts=request.query_texts,
+        retrieval_top_k=request.top_k,
+        use_reranker=request.use_reranker,
+        reranker_model_name=request.reranker_model_name,
+        reranker_top_k=request.reranker_top_k,
+        ef_search=request.ef_search,
+        with_payload=request.with_payload,
+        reranker_config=request.reranker_config,
+    )
+    return {
+        "results": [
+            {
+                "query_text": query_text,
+                "results": pipeline_result["retrieved"],
+                "reranked": pipeline_result["reranked"],
+            }
+            for query_text, pipeline_result in zip(request.query_texts, pipeline_results)
+        ]
+    }
+
+
+@router.post("/models/{model_id}/search-backend")
+async def set_search_backend(
+    model_id: int, request: SearchBackendUpdate, db: AsyncSession = Depends(get_db)
+) -> dict:
+    if request.search_backend not in SEARCH_BACKENDS:
+        raise HTTPException(status_code=400, detail="Unknown search backend")
+    result = await db.execute(
+        select(models.EmbeddingModel).where(models.EmbeddingModel.id == model_id)
+    )
+    model = result.scalar_one_or_none()
+    if model is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    model.config = {**model.config, "search_backend": request.search_backend}
+    await db.commit()
+    return {"id": model.id, "search_backend": request.search_backend}
+
+
+@router.post("/models/{model_id}/ef-search-sweep")
+async def ef_search_sweep(
+    model_id: int, request: EfSearchSweepRequest, db: AsyncSession = Depends(get_db)
+) -> dict:
+    result = await db.execute(
+        select(models.EmbeddingModel).where(models.EmbeddingModel.id == model_id)
+    )
+    model = result.scalar_one_or_none()
+    if model is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    if model.status != "ready":
+        raise HTTPException(status_code=400, detail="Model is not ready")
+
+    service = SearchBenchmarkService(db, ModelManager())
+    try:
+        return await service.sweep_ef_search(
+            model,
+            ef_search_values=request.ef_search_values,
+            sample_size=request.sample_size,
+            top_k=request.top_k,
+            sample_seed=request.sample_seed,
+            api_key=request.api_key,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.get("/models/{model_id}/backend-stats")
+async def backend_stats(model_id: int, db: AsyncSession = Depends(get_db)) -> dict:
+    result = await db.execute(
+        select(models.EmbeddingModel).where(models.EmbeddingModel.id == model_id)
+    )
+    model = result.scalar_one_or_none()
+    if model is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    return await get_vector_backend(db, model).stats()
+
+
+@router.post("/models/{model_id}/backend-benchmark")
+async def backend_benchmark(
+    model_id: int, request: BackendBenchmarkRequest, db: AsyncSession = Depends(get_db)
+) -> dict:
+    unknown = [name for name in request.backends if name not in SEARCH_BACKENDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search backends: {unknown}")
+    result = await db.execute(
+        select(models.EmbeddingModel).where(models.EmbeddingModel.id == model_id)
+    )
+    model = result.scalar_one_or_none()
+    if model is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    if model.status != "ready":
+        raise HTTPException(status_code=400, detail="Model is not ready")
+
+    service = SearchBenchmarkService(db, ModelManager())
+    try:
+        return await service.compare_backends(
+            model,
+            backend_names=request.backends,
+            sample_size=request.sample_size,
+            top_k=request.top_k,
+            sample_seed=request.sample_seed,
+            api_key=request.api_key,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import desc, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,23 +11,27 @@ from backend.core.database import get_db
 from backend.models import database as models
 from backend.models.schemas import EvaluationRunCreate
 from backend.services.evaluation_service import EvaluationService
+from backend.services.job_queue import JobQueue
 
 router = APIRouter()
 
 
 @router.post("/runs")
 async def create_run(
-    request: EvaluationRunCreate, background: BackgroundTasks, db: AsyncSession = Depends(get_db)
+    request: EvaluationRunCreate, db: AsyncSession = Depends(get_db)
 ) -> dict:
     service = EvaluationService(db)
     try:
         run = await service.create_run(request)
+        job = await JobQueue(db).enqueue(
+            "evaluation", {"config": request.model_dump(mode="json"), "run_id": run.id}
+        )
         await db.commit()
-        background.add_task(service.run_evaluation_async, request, run.id)
         return {
             "run_id": run.id,
+            "job_id": job.id,
             "status": "running",
-            "message": "Evaluation started",
+            "message": "Evaluation queued",
         }
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
@@ -85,12 +89,14 @@ async def get_run(run_id: int, db: AsyncSession = Depends(get_db)) -> dict:
         "config": {
             "embedding_model": embedding_model.model_name if embedding_model else None,
             "retrieval_top_k": run.retrieval_top_k,
+            "ef_search": run.ef_search,
             "reranker_model": run.reranker_model_name,
             "reranker_top_k": run.reranker_top_k,
             "judge_model": run.judge_model_name,
             "sample_size": run.sample_size,
         },
         "metrics_summary": run.metrics_summary,
+        "run_stats": run.run_stats,
         "token_usage": {
             "total_judge_input": run.total_judge_input_tokens,
             "total_judge_output": run.total_judge_output_tokens,
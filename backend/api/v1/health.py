@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from backend.config import settings
 from backend.core.database import get_db
 from backend.core.progress import progress_store
+from backend.services.job_queue import JobQueue
 
 router = APIRouter()
 
@@ -25,5 +26,6 @@ async def health_check(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/progress", summary="Get current progress")
-async def get_progress():
-    return progress_store.copy()
+async def get_progress(db: AsyncSession = Depends(get_db)):
+    # Jobs run in worker processes and publish progress through the jobs table.
+    return {**progress_store, **await JobQueue(db).latest_progress()}
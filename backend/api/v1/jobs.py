@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.database import get_db
+from backend.services.job_queue import JobQueue, serialize_job
+
+router = APIRouter()
+
+
+@router.get("")
+async def list_jobs(
+    limit: int = 50, status: Optional[str] = None, db: AsyncSession = Depends(get_db)
+) -> dict:
+    jobs = await JobQueue(db).list_jobs(limit=limit, status=status)
+    return {"jobs": [serialize_job(job) for job in jobs]}
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)) -> dict:
+    job = await JobQueue(db).get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: int, db: AsyncSession = Depends(get_db)) -> dict:
+    job = await JobQueue(db).request_cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
@@ -5,7 +5,10 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.core.database import get_db
+from backend.core.inference_executor import inference_executor
 from backend.core.model_manager import ModelManager
+from backend.core.query_cache import query_embedding_cache
+from backend.core.score_cache import reranker_score_cache
 
 router = APIRouter()
 
@@ -38,8 +41,20 @@ async def get_memory_status(db: AsyncSession = Depends(get_db)) -> dict:
     return {
         "loaded_models": loaded_models,
         "total_memory_mb": total_memory_mb,
+        "model_budget_mb": manager.budget_mb or None,
+        "model_evictions": manager.evictions,
         "system_memory_mb": _get_system_memory_mb(),
         "available_memory_mb": _get_available_memory_mb(),
+        "query_cache": query_embedding_cache.stats(),
+        "reranker_score_cache": reranker_score_cache.stats(),
+    }
+
+
+@router.get("/inference")
+async def get_inference_status() -> dict:
+    return {
+        "executor": inference_executor.stats(),
+        "schedulers": ModelManager().scheduler_stats(),
     }
 
 
@@ -47,7 +62,7 @@ async def get_memory_status(db: AsyncSession = Depends(get_db)) -> dict:
 async def unload_models(db: AsyncSession = Depends(get_db)) -> dict:
     manager = ModelManager()
     total_before = int(manager.total_memory_mb())
-    ModelManager.unload_all_instances()
+    manager.unload_all()
     return {
         "message": "All models unloaded",
         "freed_memory_mb": total_before,
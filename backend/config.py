@@ -8,6 +8,25 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     api_version: str = "v1"
     app_version: str = "1.0.0"
+    vector_data_dir: str = "/app/data/vectors"
+    corpus_store_dir: str = "/app/data/corpus"
+    query_cache_mb: float = 64.0
+    reranker_score_cache_entries: int = 1_000_000
+    inference_workers: int = 2
+    inference_max_pending: int = 64
+    inference_torch_threads: int = 0
+    microbatch_window_ms: float = 5.0
+    microbatch_max_items: int = 256
+    # 0 disables eviction.
+    model_memory_budget_mb: float = 0.0
+    embedding_cache_dir: str = "/app/data/embedding_cache"
+    openai_base_url: str = "https://api.openai.com/v1"
+    # Used by embedding jobs; keys are never written to the jobs table.
+    openai_api_key: str = ""
+    job_poll_seconds: float = 2.0
+    job_heartbeat_seconds: float = 10.0
+    job_stale_seconds: float = 120.0
+    embedded_worker: bool = False
 
     class Config:
         env_prefix = ""
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from backend.core.inference_executor import LATENCY_SAMPLES, inference_executor
+
+BatchFn = Callable[[List[Any]], Sequence[Any]]
+
+
+class MicroBatcher:
+    """Coalesces concurrent inference requests for one model into shared batches.
+
+    Callers ``submit`` a list of items (texts or pairs). The first item of a
+    new batch opens a ``window_ms`` window; the batch is run when the window
+    closes or ``max_items`` have been collected, as one ``run_batch`` call on
+    the inference executor, and each caller gets back the results for its
+    own items.
+    """
+
+    def __init__(self, run_batch: BatchFn, window_ms: float, max_items: int) -> None:
+        self.run_batch = run_batch
+        self.window_ms = window_ms
+        self.max_items = max(1, max_items)
+        self._pending: List[Tuple[List[Any], asyncio.Future, float]] = []
+        self._pending_items = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self._batch_sizes: Counter = Counter()
+        self._queue_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    async def submit(self, items: List[Any]) -> Sequence[Any]:
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((list(items), future, time.perf_counter()))
+        self._pending_items += len(items)
+        if self._pending_items >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_items = self._pending, [], 0
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[List[Any], asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        items = [item for request_items, _, _ in batch for item in request_items]
+        self.batches += 1
+        self.items += len(items)
+        self._batch_sizes[_size_bucket(len(items))] += 1
+        for _, _, submitted in batch:
+            self._queue_ms.append((started - submitted) * 1000)
+        try:
+            results = await inference_executor.run(self.run_batch, items)
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        offset = 0
+        for request_items, future, _ in batch:
+            if not future.done():
+                future.set_result(results[offset : offset + len(request_items)])
+            offset += len(request_items)
+
+    def stats(self) -> Dict[str, Any]:
+        queue_ms = list(self._queue_ms)
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_sizes": dict(
+                sorted(self._batch_sizes.items(), key=lambda kv: int(kv[0].split("-")[0]))
+            ),
+            "queue_ms": {
+                "p50": round(float(np.percentile(queue_ms, 50)), 3) if queue_ms else 0.0,
+                "p95": round(float(np.percentile(queue_ms, 95)), 3) if queue_ms else 0.0,
+            },
+        }
+
+
+def _size_bucket(size: int) -> str:
+    """Power-of-two histogram bucket, e.g. 5 -> "5-8"."""
+    if size <= 2:
+        return str(size)
+    upper = 1 << (size - 1).bit_length()
+    return f"{upper // 2 + 1}-{upper}"
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+
+import numpy as np
+import torch
+
+from backend.config import settings
+
+T = TypeVar("T")
+
+# Recent wait/run samples kept for the latency percentiles in ``stats``.
+LATENCY_SAMPLES = 1024
+
+
+class InferenceExecutor:
+    """Bounded thread pool for blocking model inference called from async code.
+
+    ``run`` awaits a slot (at most ``max_pending`` calls queued or running),
+    then hands the call to one of ``workers`` threads, so the event loop keeps
+    serving other requests while a model encodes or predicts. Torch's
+    intra-op threads are split across the workers instead of each call
+    trying to use every core.
+    """
+
+    def __init__(self, workers: int, max_pending: int, torch_threads: Optional[int] = None) -> None:
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self._wait_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._run_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self._pool is None:
+            torch.set_num_threads(self.torch_threads)
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="inference"
+            )
+            self._slots = asyncio.Semaphore(self.max_pending)
+        submitted = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            with self._lock:
+                self.queued += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._pool, self._call, submitted, fn, args, kwargs
+            )
+        finally:
+            self._slots.release()
+
+    def _call(self, submitted: float, fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        started = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self._wait_ms.append((started - submitted) * 1000)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self._run_ms.append((time.perf_counter() - started) * 1000)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+            self._slots = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            wait_ms, run_ms = list(self._wait_ms), list(self._run_ms)
+            return {
+                "workers": self.workers,
+                "torch_threads": self.torch_threads,
+                "max_pending": self.max_pending,
+                "queue_depth": self.waiting + self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "wait_ms": _summary(wait_ms),
+                "run_ms": _summary(run_ms),
+            }
+
+
+def _summary(samples: list) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "mean": 0.0}
+    return {
+        "p50": round(float(np.percentile(samples, 50)), 3),
+        "p95": round(float(np.percentile(samples, 95)), 3),
+        "mean": round(float(np.mean(samples)), 3),
+    }
+
+
+inference_executor = InferenceExecutor(
+    settings.inference_workers,
+    settings.inference_max_pending,
+    settings.inference_torch_threads or None,
+)
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 import gc
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import torch
 from sentence_transformers import CrossEncoder, SentenceTransformer
 
+from backend.config import settings
+from backend.core.batch_scheduler import BatchFn, MicroBatcher
+
 
 @dataclass
 class LoadedModel:
@@ -14,77 +22,202 @@ class LoadedModel:
     model_type: str
     model: Any
     memory_mb: float
+    load_seconds: float = 0.0
+    hits: int = 0
+    last_used: float = field(default_factory=time.time)
 
 
 class ModelManager:
-    _shared_models: Dict[str, LoadedModel] = {}
-    _instances: List["ModelManager"] = []
-
-    def __init__(self) -> None:
-        self._models = ModelManager._shared_models
-        ModelManager._instances.append(self)
+    """Process-wide registry of loaded embedding and reranker models.
+
+    ``ModelManager()`` always returns the same instance. Models are kept in
+    least-recently-used order; when loading one pushes the total past
+    ``model_memory_budget_mb``, the least recently used models that are not
+    pinned are unloaded until the total fits again.
+    """
+
+    _instance: Optional["ModelManager"] = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls) -> "ModelManager":
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance._models: "OrderedDict[str, LoadedModel]" = OrderedDict()
+                instance._pins: Counter = Counter()
+                instance._lock = threading.RLock()
+                instance._loading: Dict[str, threading.Lock] = {}
+                instance._batchers: Dict[Tuple[Any, ...], MicroBatcher] = {}
+                instance.budget_mb = settings.model_memory_budget_mb
+                instance.evictions = 0
+                cls._instance = instance
+            return cls._instance
+
+    @staticmethod
+    def embedding_key(model_name: str) -> str:
+        return f"embedding::{model_name}"
+
+    @staticmethod
+    def reranker_key(model_name: str, max_length: Optional[int] = None) -> str:
+        # Truncation is fixed when a CrossEncoder is built, so each max_length
+        # gets its own instance.
+        key = f"reranker::{model_name}"
+        return f"{key}::{max_length}" if max_length else key
 
     def load_embedding_model(self, model_name: str, device: Optional[str] = None) -> LoadedModel:
-        key = f"embedding::{model_name}"
-        if key in self._models:
-            return self._models[key]
-
-        model = SentenceTransformer(model_name, device=device)
-        memory_mb = self._estimate_model_size(model)
-        loaded = LoadedModel(name=model_name, model_type="embedding", model=model, memory_mb=memory_mb)
-        self._models[key] = loaded
-        return loaded
-
-    def load_reranker_model(self, model_name: str, device: Optional[str] = None) -> LoadedModel:
-        key = f"reranker::{model_name}"
-        if key in self._models:
-            return self._models[key]
+        return self._get_or_load(
+            self.embedding_key(model_name),
+            model_name,
+            "embedding",
+            lambda: SentenceTransformer(model_name, device=device),
+        )
+
+    def load_reranker_model(
+        self, model_name: str, device: Optional[str] = None, max_length: Optional[int] = None
+    ) -> LoadedModel:
+        return self._get_or_load(
+            self.reranker_key(model_name, max_length),
+            model_name,
+            "reranker",
+            lambda: CrossEncoder(model_name, device=device, max_length=max_length),
+        )
+
+    @contextmanager
+    def pinned(self, *keys: str) -> Iterator[None]:
+        """Exempt the models under ``keys`` from eviction while the block runs."""
+        with self._lock:
+            self._pins.update(keys)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins.subtract(keys)
+                self._pins += Counter()
+                self._evict()
+
+    async def batched(
+        self, key: Tuple[Any, ...], items: List[Any], run_batch: BatchFn
+    ) -> Sequence[Any]:
+        """Run ``items`` through the shared micro-batcher for ``key``.
+
+        Concurrent callers with the same key share one forward pass;
+        ``run_batch`` is only used when the key's batcher is created.
+        """
+        batcher = self._batchers.get(key)
+        if batcher is None:
+            batcher = MicroBatcher(
+                run_batch, settings.microbatch_window_ms, settings.microbatch_max_items
+            )
+            self._batchers[key] = batcher
+        return await batcher.submit(items)
 
-        model = CrossEncoder(model_name, device=device)
-        memory_mb = self._estimate_model_size(model)
-        loaded = LoadedModel(name=model_name, model_type="reranker", model=model, memory_mb=memory_mb)
-        self._models[key] = loaded
-        return loaded
+    def scheduler_stats(self) -> List[Dict[str, Any]]:
+        return [
+            {"type": key[0], "name": key[1], **batcher.stats()}
+            for key, batcher in self._batchers.items()
+        ]
 
     def unload(self, model_type: str, model_name: str) -> None:
-        key = f"{model_type}::{model_name}"
-        if key not in self._models:
-            return
-        del self._models[key]
-        gc.collect()
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        with self._lock:
+            keys = [
+                key
+                for key, model in self._models.items()
+                if model.model_type == model_type and model.name == model_name
+            ]
+            for key in keys:
+                del self._models[key]
+        if keys:
+            self._release_memory()
 
     def unload_all(self) -> None:
-        self._models.clear()
-        gc.collect()
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-
-    @classmethod
-    def unload_all_instances(cls) -> None:
-        cls._shared_models.clear()
-        gc.collect()
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        with self._lock:
+            self._models.clear()
+        self._release_memory()
 
     def get_loaded_models(self) -> List[Dict[str, Any]]:
-        return [
-            {
-                "type": model.model_type,
-                "name": model.name,
-                "memory_mb": model.memory_mb,
-            }
-            for model in self._models.values()
-        ]
+        with self._lock:
+            return [
+                {
+                    "type": model.model_type,
+                    "name": model.name,
+                    "key": key,
+                    "memory_mb": model.memory_mb,
+                    "load_seconds": round(model.load_seconds, 3),
+                    "hits": model.hits,
+                    "last_used": datetime.fromtimestamp(model.last_used).isoformat(),
+                    "pinned": self._pins[key] > 0,
+                }
+                for key, model in self._models.items()
+            ]
 
     def total_memory_mb(self) -> float:
-        return sum(model.memory_mb for model in self._models.values())
+        with self._lock:
+            return sum(model.memory_mb for model in self._models.values())
+
+    def _get_or_load(
+        self, key: str, name: str, model_type: str, factory: Callable[[], Any]
+    ) -> LoadedModel:
+        with self._lock:
+            loaded = self._touch(key)
+            if loaded is not None:
+                return loaded
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        # Loading happens outside the registry lock so other models stay
+        # usable; the per-key lock stops two threads loading the same one.
+        with load_lock:
+            with self._lock:
+                loaded = self._touch(key)
+                if loaded is not None:
+                    return loaded
+            started = time.perf_counter()
+            model = factory()
+            loaded = LoadedModel(
+                name=name,
+                model_type=model_type,
+                model=model,
+                memory_mb=self._estimate_model_size(model),
+                load_seconds=time.perf_counter() - started,
+            )
+            with self._lock:
+                self._models[key] = loaded
+                self._evict(keep=key)
+        return loaded
+
+    def _touch(self, key: str) -> Optional[LoadedModel]:
+        loaded = self._models.get(key)
+        if loaded is not None:
+            loaded.hits += 1
+            loaded.last_used = time.time()
+            self._models.move_to_end(key)
+        return loaded
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        if not self.budget_mb:
+            return
+        evicted = False
+        total = sum(model.memory_mb for model in self._models.values())
+        for key in list(self._models):
+            if total <= self.budget_mb:
+                break
+            if key == keep or self._pins[key] > 0:
+                continue
+            total -= self._models.pop(key).memory_mb
+            self.evictions += 1
+            evicted = True
+        if evicted:
+            self._release_memory()
+
+    def _release_memory(self) -> None:
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
 
     def _estimate_model_size(self, model: Any) -> float:
-        if hasattr(model, "parameters"):
+        # A CrossEncoder is not an nn.Module; its weights live on ``.model``.
+        module = model if hasattr(model, "parameters") else getattr(model, "model", None)
+        if hasattr(module, "parameters"):
             total_bytes = sum(
-                p.numel() * p.element_size() for p in model.parameters() if hasattr(p, "numel")
+                p.numel() * p.element_size() for p in module.parameters() if hasattr(p, "numel")
             )
             return total_bytes / (1024 * 1024)
         return 0.0
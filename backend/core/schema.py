@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from backend.core.database import Base
+from backend.models import database  # noqa: F401
+
+# Columns added to tables that existed before them. ``create_all`` only
+# creates missing tables, so databases created earlier get these here.
+ADDED_COLUMNS = (
+    ("embedding_models", "last_corpus_id", "INTEGER DEFAULT 0"),
+    (
+        "embedding_models",
+        "parent_model_id",
+        "INTEGER REFERENCES embedding_models (id) ON DELETE SET NULL",
+    ),
+    ("embedding_models", "projection", "BYTEA"),
+    ("embedding_models", "job_stats", "JSONB"),
+    ("embedding_models", "index_build_seconds", "DOUBLE PRECISION"),
+    ("embedding_models", "index_size_bytes", "BIGINT"),
+    ("evaluation_runs", "ef_search", "INTEGER"),
+    ("evaluation_runs", "run_stats", "JSONB"),
+)
+
+
+async def create_schema(conn: AsyncConnection) -> None:
+    """Create missing tables and add columns missing from existing ones."""
+    await conn.run_sync(Base.metadata.create_all)
+    for table, column, definition in ADDED_COLUMNS:
+        await conn.execute(
+            text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}")
+        )
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+
 from fastapi import FastAPI
 
 from backend.api.router import api_router
 from backend.config import settings
-from backend.core.database import Base, engine
+from backend.core.database import engine
+from backend.core.inference_executor import inference_executor
 from backend.core.progress import progress_store
-from backend.models import database  # noqa: F401
+from backend.core.schema import create_schema
 
 
 def create_app() -> FastAPI:
@@ -16,7 +19,18 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     async def startup() -> None:
         async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+            await create_schema(conn)
+        if settings.embedded_worker:
+            # Single-process setups: run jobs on the API loop instead of a
+            # separate `python -m backend.worker`.
+            from backend.worker import JobWorker
+
+            app.state.worker = JobWorker()
+            app.state.worker_task = asyncio.create_task(app.state.worker.run_forever())
+
+    @app.on_event("shutdown")
+    async def shutdown() -> None:
+        inference_executor.shutdown()
 
     return app
 
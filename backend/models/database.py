@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
     Column,
     DateTime,
@@ -10,6 +11,7 @@ from sqlalchemy import (
     ForeignKeyConstraint,
     Index,
     Integer,
+    LargeBinary,
     String,
     Text,
     UniqueConstraint,
@@ -112,6 +114,13 @@ class EmbeddingModel(Base):
     config = Column(JSONB, nullable=False)
     status = Column(String(50), server_default="pending")
     total_vectors = Column(Integer, server_default="0")
+    last_corpus_id = Column(Integer, server_default="0")
+    # Reduced variants are embedded in their parent's job from the same encodings.
+    parent_model_id = Column(Integer, ForeignKey("embedding_models.id", ondelete="SET NULL"))
+    projection = Column(LargeBinary)
+    job_stats = Column(JSONB)
+    index_build_seconds = Column(Float)
+    index_size_bytes = Column(BigInteger)
     error_message = Column(Text)
     api_key_hash = Column(String(64))
     started_at = Column(DateTime)
@@ -132,6 +141,7 @@ class EvaluationRun(Base):
 
     embedding_model_id = Column(Integer, ForeignKey("embedding_models.id"), nullable=False)
     retrieval_top_k = Column(Integer, nullable=False)
+    ef_search = Column(Integer)
 
     use_reranker = Column(Boolean, server_default="false")
     reranker_model_name = Column(String(255))
@@ -148,6 +158,7 @@ class EvaluationRun(Base):
     error_message = Column(Text)
 
     metrics_summary = Column(JSONB)
+    run_stats = Column(JSONB)
 
     total_embedding_tokens = Column(Integer, server_default="0")
     total_judge_input_tokens = Column(Integer, server_default="0")
@@ -217,3 +228,36 @@ class JudgeScore(Base):
     track_b_output_tokens = Column(Integer)
 
     created_at = Column(DateTime, server_default=func.now())
+
+
+class RerankerScore(Base):
+    __tablename__ = "reranker_scores"
+
+    model_key = Column(String(255), primary_key=True)
+    query_hash = Column(String(64), primary_key=True)
+    corpus_id = Column(Integer, primary_key=True)
+    score = Column(Float, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("idx_jobs_status", "status", "id"),
+        Index("idx_jobs_type", "job_type"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    job_type = Column(String(50), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    status = Column(String(50), nullable=False, server_default="queued")
+    cancel_requested = Column(Boolean, nullable=False, server_default="false")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    worker_id = Column(String(255))
+    progress = Column(JSONB)
+    result = Column(JSONB)
+    error_message = Column(Text)
+    heartbeat_at = Column(DateTime)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    created_at = Column(DateTime, server_default=func.now())
@@ -20,7 +20,15 @@ class EmbeddingModelCreate(BaseModel):
     model_source: ModelSource
     dimension: int = Field(..., gt=0, le=4096)
     config: Dict[str, Any] = Field(default_factory=dict)
-    api_key: Optional[str] = Field(default=None, description="API key for OpenAI")
+    api_key: Optional[str] = Field(
+        default=None, description="Not accepted; embedding jobs read OPENAI_API_KEY"
+    )
+
+
+class EmbeddingResumeRequest(BaseModel):
+    api_key: Optional[str] = Field(
+        default=None, description="Not accepted; embedding jobs read OPENAI_API_KEY"
+    )
 
 
 class RerankerConfig(BaseModel):
@@ -44,6 +52,7 @@ class EvaluationRunCreate(BaseModel):
     judge_config: JudgeConfig
     sample_size: int = Field(default=100, ge=1, le=3045)
     sample_seed: Optional[int] = Field(default=None)
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
 
 
 class SearchRequest(BaseModel):
@@ -53,6 +62,41 @@ class SearchRequest(BaseModel):
     use_reranker: bool = False
     reranker_model_name: Optional[str] = None
     reranker_top_k: int = Field(default=5, ge=1, le=50)
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+
+
+class BatchSearchRequest(BaseModel):
+    model_id: int
+    query_texts: List[str] = Field(..., min_length=1, max_length=1000)
+    top_k: int = Field(default=10, ge=1, le=100)
+    use_reranker: bool = False
+    reranker_model_name: Optional[str] = None
+    reranker_top_k: int = Field(default=5, ge=1, le=50)
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)
+    with_payload: bool = False
+    reranker_config: Dict[str, Any] = Field(
+        default_factory=dict, description="max_length, max_batch_tokens, max_batch_size"
+    )
+
+
+class SearchBackendUpdate(BaseModel):
+    search_backend: str = Field(..., description="pgvector, exact or ivf")
+
+
+class EfSearchSweepRequest(BaseModel):
+    ef_search_values: List[int] = Field(default_factory=lambda: [10, 20, 40, 80, 160, 320])
+    sample_size: int = Field(default=100, ge=1, le=3045)
+    sample_seed: Optional[int] = Field(default=None)
+    top_k: int = Field(default=10, ge=1, le=500)
+    api_key: Optional[str] = Field(default=None, description="API key for OpenAI")
+
+
+class BackendBenchmarkRequest(BaseModel):
+    backends: List[str] = Field(default_factory=lambda: ["pgvector", "ivf"])
+    sample_size: int = Field(default=100, ge=1, le=3045)
+    sample_seed: Optional[int] = Field(default=None)
+    top_k: int = Field(default=10, ge=1, le=500)
+    api_key: Optional[str] = Field(default=None, description="API key for OpenAI")
 
 
 class DatasetStatus(BaseModel):
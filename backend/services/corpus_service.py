@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import database as models
+from backend.services.corpus_store import get_corpus_store
+
+# Ids per lookup, well under asyncpg's 32767 bind parameters per statement.
+FETCH_CHUNK_IDS = 10000
+
+
+class CorpusService:
+    """Batched reads of corpus sections keyed by ``corpus.id``.
+
+    Sections come from the memory-mapped corpus store when it has been
+    built; anything it cannot serve is read from Postgres, one query per
+    ``FETCH_CHUNK_IDS`` ids.
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def fetch_section(self, doc_id: str, section_id: int) -> Optional[dict]:
+        """One section by (doc_id, section_id), from the store when it holds it."""
+        store = get_corpus_store()
+        corpus_id = store.find(doc_id, section_id) if store is not None else None
+        if corpus_id is not None:
+            return store.get(corpus_id)
+        result = await self.db.execute(
+            select(models.Corpus).where(
+                models.Corpus.doc_id == doc_id, models.Corpus.section_id == section_id
+            )
+        )
+        row = result.scalar_one_or_none()
+        if row is None:
+            return None
+        return {
+            "corpus_id": row.id,
+            "doc_id": row.doc_id,
+            "section_id": row.section_id,
+            "text": row.section_text,
+            "tables_markdown": row.tables_markdown,
+            "has_images": row.has_images,
+        }
+
+    async def fetch_sections(self, corpus_ids: Iterable[int]) -> Dict[int, dict]:
+        ids = list(dict.fromkeys(corpus_ids))
+        store = get_corpus_store()
+        sections = store.get_many(ids) if store is not None else {}
+        ids = [corpus_id for corpus_id in ids if corpus_id not in sections]
+        if not ids:
+            return sections
+        for start in range(0, len(ids), FETCH_CHUNK_IDS):
+            result = await self.db.execute(
+                select(
+                    models.Corpus.id,
+                    models.Corpus.doc_id,
+                    models.Corpus.section_id,
+                    models.Corpus.section_text,
+                    models.Corpus.tables_markdown,
+                ).where(models.Corpus.id.in_(ids[start : start + FETCH_CHUNK_IDS]))
+            )
+            for row in result.all():
+                sections[row.id] = {
+                    "corpus_id": row.id,
+                    "doc_id": row.doc_id,
+                    "section_id": row.section_id,
+                    "text": row.section_text,
+                    "tables_markdown": row.tables_markdown,
+                }
+        return sections
+
+    def in_order(self, items: Iterable[dict], sections: Dict[int, dict]) -> List[dict]:
+        """Sections for ``items`` in their ranked order, skipping unknown ids."""
+        return [sections[item["corpus_id"]] for item in items if item["corpus_id"] in sections]
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import mmap
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import settings
+from backend.models import database as models
+
+_FIELDS = ("texts", "tables")
+
+
+class CorpusTextStore:
+    """Read-only corpus section store indexed directly by ``corpus.id``.
+
+    Section text and table markdown each live in one contiguous UTF-8 blob
+    with an int64 offsets array, so the bytes of section ``i`` are
+    ``blob[offsets[i]:offsets[i + 1]]``. Blobs are memory-mapped, so every
+    worker process shares the same page cache. ``find`` maps a
+    (doc_id, section_id) pair back to its id.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.manifest = json.loads((directory / "manifest.json").read_text(encoding="utf-8"))
+        self.section_ids = np.load(directory / "section_ids.npy", mmap_mode="r")
+        self.doc_ids = np.load(directory / "doc_ids.npy", mmap_mode="r")
+        self.has_images = np.load(directory / "has_images.npy", mmap_mode="r")
+        self._offsets = {name: np.load(directory / f"{name}_offsets.npy") for name in _FIELDS}
+        self._blobs = {name: self._map(directory / f"{name}.bin") for name in _FIELDS}
+        self._ids_by_key: Optional[Dict[Tuple[str, int], int]] = None
+
+    def __contains__(self, corpus_id: int) -> bool:
+        return 0 <= corpus_id < len(self.section_ids) and self.section_ids[corpus_id] >= 0
+
+    def get(self, corpus_id: int) -> Optional[dict]:
+        if corpus_id not in self:
+            return None
+        tables = self._read("tables", corpus_id)
+        return {
+            "corpus_id": corpus_id,
+            "doc_id": str(self.doc_ids[corpus_id]),
+            "section_id": int(self.section_ids[corpus_id]),
+            "text": self._read("texts", corpus_id),
+            "tables_markdown": tables or None,
+            "has_images": bool(self.has_images[corpus_id]),
+        }
+
+    def find(self, doc_id: str, section_id: int) -> Optional[int]:
+        """Corpus id of a section, or None if the store does not hold it."""
+        if self._ids_by_key is None:
+            # Built on first use; most readers only ever look up by id.
+            present = np.flatnonzero(np.asarray(self.section_ids) >= 0)
+            self._ids_by_key = {
+                (str(self.doc_ids[idx]), int(self.section_ids[idx])): int(idx) for idx in present
+            }
+        return self._ids_by_key.get((doc_id, section_id))
+
+    def get_many(self, corpus_ids: Iterable[int]) -> Dict[int, dict]:
+        sections = {}
+        for corpus_id in corpus_ids:
+            section = self.get(corpus_id)
+            if section is not None:
+                sections[corpus_id] = section
+        return sections
+
+    def _read(self, field: str, corpus_id: int) -> str:
+        offsets = self._offsets[field]
+        start, end = int(offsets[corpus_id]), int(offsets[corpus_id + 1])
+        return str(memoryview(self._blobs[field])[start:end], "utf-8")
+
+    def _map(self, path: Path) -> mmap.mmap | bytes:
+        if path.stat().st_size == 0:
+            return b""
+        with open(path, "rb") as handle:
+            return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def store_dir() -> Path:
+    return Path(settings.corpus_store_dir)
+
+
+_store: Optional[CorpusTextStore] = None
+_store_mtime: Optional[float] = None
+
+
+def get_corpus_store() -> Optional[CorpusTextStore]:
+    """Process-wide store, reopened whenever a rebuild replaces the manifest.
+
+    Stores written before a format change (missing files) count as absent,
+    so readers use Postgres until the store is rebuilt.
+    """
+    global _store, _store_mtime
+    manifest = store_dir() / "manifest.json"
+    try:
+        mtime = manifest.stat().st_mtime
+    except FileNotFoundError:
+        _store, _store_mtime = None, None
+        return None
+    if _store is None or mtime != _store_mtime:
+        try:
+            _store, _store_mtime = CorpusTextStore(store_dir()), mtime
+        except FileNotFoundError:
+            _store, _store_mtime = None, None
+    return _store
+
+
+def invalidate_corpus_store() -> None:
+    # Removing the manifest first makes readers fall back to Postgres
+    # while the corpus is being replaced.
+    (store_dir() / "manifest.json").unlink(missing_ok=True)
+
+
+async def build_corpus_store(db: AsyncSession, page_size: int = 5000) -> Path:
+    directory = store_dir()
+    staging = directory.with_name(directory.name + ".staging")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    max_id_result = await db.execute(select(func.max(models.Corpus.id)))
+    max_id = int(max_id_result.scalar_one() or 0)
+    section_ids = np.full(max_id + 1, -1, dtype=np.int32)
+    doc_ids = np.full(max_id + 1, "", dtype=object)
+    has_images = np.zeros(max_id + 1, dtype=bool)
+    offsets = {name: np.zeros(max_id + 2, dtype=np.int64) for name in _FIELDS}
+    positions = {name: 0 for name in _FIELDS}
+    handles = {name: open(staging / f"{name}.bin", "wb") for name in _FIELDS}
+    rows = 0
+    last_id = 0
+    try:
+        while True:
+            result = await db.execute(
+                select(
+                    models.Corpus.id,
+                    models.Corpus.doc_id,
+                    models.Corpus.section_id,
+                    models.Corpus.section_text,
+                    models.Corpus.tables_markdown,
+                    models.Corpus.has_images,
+                )
+                .where(models.Corpus.id > last_id)
+                .order_by(models.Corpus.id)
+                .limit(page_size)
+            )
+            page = result.all()
+            if not page:
+                break
+            for row in page:
+                section_ids[row.id] = row.section_id
+                doc_ids[row.id] = row.doc_id
+                has_images[row.id] = bool(row.has_images)
+                for name, value in (("texts", row.section_text), ("tables", row.tables_markdown)):
+                    encoded = (value or "").encode("utf-8")
+                    # Ids without a row get empty ranges.
+                    offsets[name][last_id + 1 : row.id + 1] = positions[name]
+                    handles[name].write(encoded)
+                    positions[name] += len(encoded)
+                last_id = row.id
+            rows += len(page)
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    for name in _FIELDS:
+        offsets[name][last_id + 1 :] = positions[name]
+        np.save(staging / f"{name}_offsets.npy", offsets[name])
+    np.save(staging / "section_ids.npy", section_ids)
+    np.save(staging / "doc_ids.npy", doc_ids.astype(str))
+    np.save(staging / "has_images.npy", has_images)
+    (staging / "manifest.json").write_text(
+        json.dumps({"rows": rows, "max_id": max_id, "built_at": datetime.utcnow().isoformat()}),
+        encoding="utf-8",
+    )
+
+    shutil.rmtree(directory, ignore_errors=True)
+    staging.rename(directory)
+    return directory
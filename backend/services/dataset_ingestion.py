@@ -6,8 +6,10 @@ from typing import List
 from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.core.database import Base, engine
+from backend.core.database import engine
+from backend.core.schema import create_schema
 from backend.models import database as models
+from backend.services.corpus_store import build_corpus_store, invalidate_corpus_store
 from backend.services.dataset_service import DatasetService, ParsedDataset
 
 
@@ -22,6 +24,7 @@ class DatasetIngestionService:
         filtered = self._filter_parsed(parsed)
         await self._upsert_status(filtered, subset, status="processing")
 
+        invalidate_corpus_store()
         await self._truncate_tables()
         await self._insert_corpus(filtered.corpus)
         await self._insert_queries(filtered.queries)
@@ -31,6 +34,7 @@ class DatasetIngestionService:
 
         await self._update_status_ready(filtered)
         await self.db.commit()
+        await build_corpus_store(self.db)
 
         return {
             "status": "ready",
@@ -39,9 +43,19 @@ class DatasetIngestionService:
             "total_queries": len(filtered.queries),
         }
 
+    async def mark_failed(self, exc: Exception) -> None:
+        await self.db.rollback()
+        current = await self.get_status()
+        if current is None:
+            return
+        current.status = "error"
+        current.error_message = str(exc)
+        current.updated_at = datetime.utcnow()
+        await self.db.commit()
+
     async def _ensure_tables(self) -> None:
         async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+            await create_schema(conn)
 
     def _filter_parsed(self, parsed: ParsedDataset) -> ParsedDataset:
         query_ids = {row["query_uuid"] for row in parsed.queries}
@@ -59,7 +73,14 @@ class DatasetIngestionService:
         return ParsedDataset(corpus=corpus, queries=parsed.queries, qrels=qrels, answers=answers)
 
     async def _truncate_tables(self) -> None:
-        for table in [models.Qrel, models.Answer, models.Corpus, models.Query]:
+        # Cached reranker scores are keyed by corpus id, which new corpus rows do not reuse.
+        for table in [
+            models.Qrel,
+            models.Answer,
+            models.RerankerScore,
+            models.Corpus,
+            models.Query,
+        ]:
             await self.db.execute(delete(table))
 
     async def _insert_corpus(self, rows: List[dict]) -> None:
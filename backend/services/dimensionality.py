@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import io
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from backend.models import database as models
+from backend.services.exact_search import normalize_rows
+
+REDUCTION_METHODS = ("truncate", "pca")
+DEFAULT_PCA_SAMPLE_SIZE = 10000
+
+# Fitted reducers by model id, so query-time reduction does not reload the
+# projection on every search.
+_reducers: Dict[int, "VectorReducer"] = {}
+
+
+def stored_dimension(model: models.EmbeddingModel) -> int:
+    """Width of the vectors actually written for ``model``."""
+    config = model.config or {}
+    reduced = config.get("reduced_dimension")
+    if config.get("reduction") and reduced:
+        return int(reduced)
+    return int(model.dimension)
+
+
+def validate_reduction(config: Dict[str, Any], dimension: int) -> None:
+    method = config.get("reduction")
+    if method is None:
+        if config.get("reduced_dimension"):
+            raise ValueError("reduced_dimension requires a reduction method")
+        return
+    if method not in REDUCTION_METHODS:
+        raise ValueError(f"Unknown reduction: {method}")
+    reduced = config.get("reduced_dimension")
+    if not reduced or not 0 < int(reduced) <= dimension:
+        raise ValueError("reduced_dimension must be between 1 and the model dimension")
+    sample_size = int(config.get("pca_sample_size", DEFAULT_PCA_SAMPLE_SIZE))
+    if method == "pca" and sample_size < int(reduced):
+        raise ValueError("pca_sample_size must be at least reduced_dimension")
+
+
+class VectorReducer:
+    """Maps model embeddings to the smaller vectors stored for a model.
+
+    ``truncate`` keeps the leading components (Matryoshka models put the
+    most information there); ``pca`` projects onto principal components
+    fitted on a corpus sample. Both re-normalise, so cosine search works
+    unchanged on the reduced vectors.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        dimension: int,
+        mean: Optional[np.ndarray] = None,
+        components: Optional[np.ndarray] = None,
+    ) -> None:
+        self.method = method
+        self.dimension = dimension
+        self.mean = mean
+        self.components = components
+
+    @property
+    def fitted(self) -> bool:
+        return self.method != "pca" or self.components is not None
+
+    def apply(self, embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.method == "truncate":
+            reduced = embeddings[:, : self.dimension]
+        else:
+            if not self.fitted:
+                raise ValueError("PCA projection has not been fitted")
+            reduced = (embeddings - self.mean) @ self.components.T
+        return normalize_rows(np.ascontiguousarray(reduced, dtype=np.float32))
+
+    def fit(self, sample: np.ndarray) -> None:
+        if self.method != "pca":
+            return
+        sample = np.asarray(sample, dtype=np.float64)
+        if sample.shape[0] < self.dimension:
+            raise ValueError("PCA sample must have at least reduced_dimension rows")
+        mean = sample.mean(axis=0)
+        _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        self.mean = mean.astype(np.float32)
+        self.components = vt[: self.dimension].astype(np.float32)
+
+    def to_bytes(self) -> Optional[bytes]:
+        if self.method != "pca":
+            return None
+        buffer = io.BytesIO()
+        np.savez(buffer, mean=self.mean, components=self.components)
+        return buffer.getvalue()
+
+    @classmethod
+    def for_model(cls, model: models.EmbeddingModel) -> Optional["VectorReducer"]:
+        config = model.config or {}
+        method = config.get("reduction")
+        if method is None:
+            return None
+        reducer = cls(method, int(config["reduced_dimension"]))
+        if method == "pca" and model.projection:
+            arrays = np.load(io.BytesIO(model.projection))
+            reducer.mean, reducer.components = arrays["mean"], arrays["components"]
+        return reducer
+
+
+def reducer_for(model: models.EmbeddingModel) -> Optional[VectorReducer]:
+    """Reducer applied to ``model``'s query vectors, or None when stored at full width."""
+    cached = _reducers.get(model.id)
+    if cached is not None:
+        return cached
+    reducer = VectorReducer.for_model(model)
+    if reducer is not None and reducer.fitted:
+        _reducers[model.id] = reducer
+    return reducer
+
+
+def reduce_queries(model: models.EmbeddingModel, embeddings: np.ndarray) -> np.ndarray:
+    reducer = reducer_for(model)
+    return reducer.apply(embeddings) if reducer is not None else embeddings
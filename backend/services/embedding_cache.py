@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import hashlib
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.config import settings
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingDiskCache:
+    """Content-addressed store of embeddings for one (model, revision, normalize).
+
+    Vectors live in append-only float32 shards next to a ``.keys.npy`` file
+    holding the sha256 of each row's text. The keys file is written last,
+    so a shard without one is an interrupted write and is ignored. Shards
+    are memory-mapped on read.
+    """
+
+    def __init__(self, model_name: str, revision: str, normalize: bool) -> None:
+        namespace = f"{model_name}|{revision}|{int(normalize)}"
+        self.directory = (
+            Path(settings.embedding_cache_dir)
+            / hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:24]
+        )
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / "namespace.txt").write_text(namespace, encoding="utf-8")
+        self._shards: Dict[str, np.ndarray] = {}
+        self._index: Dict[bytes, Tuple[str, int]] = {}
+        for keys_path in sorted(self.directory.glob("*.keys.npy")):
+            self._register(keys_path.name[: -len(".keys.npy")], np.load(keys_path))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def missing(self, texts: List[str]) -> List[int]:
+        """Positions in ``texts`` that have no cached vector."""
+        return [idx for idx, text in enumerate(texts) if text_digest(text) not in self._index]
+
+    def fill(
+        self, texts: List[str], missing: List[int], computed: Optional[np.ndarray]
+    ) -> np.ndarray:
+        """Store ``computed`` rows for ``missing`` and assemble the full matrix."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        digests = [text_digest(text) for text in texts]
+        if missing:
+            computed = np.asarray(computed, dtype=np.float32)
+            self._write_shard([digests[idx] for idx in missing], computed)
+        dimension = computed.shape[1] if missing else self._row(digests[0]).shape[0]
+        embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+        missing_rows = set(missing)
+        for idx, digest in enumerate(digests):
+            if idx not in missing_rows:
+                embeddings[idx] = self._row(digest)
+        if missing:
+            embeddings[missing] = computed
+        return embeddings
+
+    def _row(self, digest: bytes) -> np.ndarray:
+        shard, row = self._index[digest]
+        return self._shards[shard][row]
+
+    def _write_shard(self, digests: List[bytes], embeddings: np.ndarray) -> None:
+        # Drop repeated texts within the batch so each key maps to one row.
+        unique: Dict[bytes, int] = {}
+        for idx, digest in enumerate(digests):
+            unique.setdefault(digest, idx)
+        rows = list(unique.values())
+        name = uuid.uuid4().hex
+        np.save(self.directory / f"{name}.npy", embeddings[rows])
+        keys = np.array(list(unique.keys()), dtype="S32")
+        np.save(self.directory / f"{name}.keys.tmp.npy", keys)
+        (self.directory / f"{name}.keys.tmp.npy").replace(self.directory / f"{name}.keys.npy")
+        self._register(name, keys)
+
+    def _register(self, name: str, keys: np.ndarray) -> None:
+        vectors_path = self.directory / f"{name}.npy"
+        if not vectors_path.exists():
+            return
+        self._shards[name] = np.load(vectors_path, mmap_mode="r")
+        for row, digest in enumerate(keys.tolist()):
+            self._index[digest] = (name, row)
@@ -0,0 +1,458 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Iterator, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import settings
+from backend.core.model_manager import ModelManager
+from backend.core.progress import progress_store
+from backend.models import database as models
+from backend.models.schemas import EmbeddingModelCreate
+from backend.services.dimensionality import (
+    DEFAULT_PCA_SAMPLE_SIZE,
+    VectorReducer,
+    stored_dimension,
+)
+from backend.services.embedding_cache import EmbeddingDiskCache
+from backend.services.embedding_pool import EmbeddingPool
+from backend.services.embedding_service import BatchPlan, EmbeddingService
+from backend.services.openai_embeddings import OpenAIEmbeddingClient
+from backend.services.vector_backend import LocalIndexBackend, PgVectorBackend, get_vector_backend
+from backend.services.vector_storage import VectorRow, VectorStorage
+
+
+def _hash_api_key(api_key: str) -> str:
+    return api_key[-4:]
+
+
+def _openai_api_key(request: EmbeddingModelCreate) -> str:
+    # Jobs queued before keys were kept out of payloads still carry one.
+    return settings.openai_api_key or request.api_key or ""
+
+
+@dataclass
+class _Target:
+    """One vector table filled by the job: the model itself or a reduced variant."""
+
+    model: models.EmbeddingModel
+    store: PgVectorBackend
+    reducer: Optional[VectorReducer]
+    after_id: int = 0
+    inserted: int = 0
+    insert_seconds: float = 0.0
+    insert_method: str = "copy"
+
+
+class EmbeddingJobService:
+    """Streams the corpus through an embedding model into its vector table.
+
+    Corpus rows are paged from Postgres by primary key, encoded one page at a
+    time and written before the next page is read, so peak memory is bounded
+    by ``page_size`` rather than by the size of the corpus.
+    """
+
+    def __init__(self, db: AsyncSession, model_manager: ModelManager) -> None:
+        self.db = db
+        self.embedding_service = EmbeddingService(model_manager)
+        self.cache: Optional[EmbeddingDiskCache] = None
+        self.reused = 0
+        self.computed = 0
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.pool: Optional[EmbeddingPool] = None
+        self.encode_seconds = 0.0
+        self.sample_vectors = 0
+        self.openai_client: Optional[OpenAIEmbeddingClient] = None
+
+    async def run(
+        self, request: EmbeddingModelCreate, model_id: int, resume: bool = False
+    ) -> int:
+        workers = int(request.config.get("encode_workers", 1))
+        api_key = _openai_api_key(request)
+        if request.model_source.value == "openai" and api_key:
+            # One client for the whole job, so its connections are reused
+            # from page to page.
+            self.openai_client = OpenAIEmbeddingClient(
+                api_key,
+                max_concurrency=int(request.config.get("openai_concurrency", 4)),
+                max_tokens_per_request=int(
+                    request.config.get("openai_max_tokens_per_request", 100000)
+                ),
+                max_inputs_per_request=int(request.config.get("batch_size", 100)),
+            )
+        elif workers > 1 and request.model_source.value != "openai":
+            torch_threads = request.config.get("torch_threads")
+            self.pool = EmbeddingPool(
+                request.model_name, workers, int(torch_threads) if torch_threads else None
+            )
+        try:
+            with self.embedding_service.model_manager.pinned(
+                ModelManager.embedding_key(request.model_name)
+            ):
+                return await self._run(request, model_id, resume)
+        finally:
+            if self.pool is not None:
+                # Joining workers that are still encoding can take a while;
+                # doing it on the loop would stall the job's heartbeat.
+                await asyncio.get_running_loop().run_in_executor(None, self.pool.close)
+                self.pool = None
+            if self.openai_client is not None:
+                await self.openai_client.aclose()
+
+    async def _run(self, request: EmbeddingModelCreate, model_id: int, resume: bool) -> int:
+        model_entry = await self._get_model(model_id)
+        targets = [
+            await self._target(model, resume)
+            for model in [model_entry, *await self._get_variants(model_id)]
+        ]
+        page_size = int(request.config.get("page_size", 1024))
+        total_rows = await self._count_corpus()
+        total_pages = (total_rows + page_size - 1) // page_size
+
+        # Every target shares one pass over the corpus, starting at the
+        # earliest checkpoint; targets that are further along skip the rows
+        # they already hold.
+        after_id = min(target.after_id for target in targets)
+        page_num = min(target.inserted for target in targets) // page_size
+        workers = self.pool.workers if self.pool else 1
+        # Worker count sits next to texts_per_second in the job status, so
+        # runs with different pool sizes can be compared directly.
+        progress_store["embedding"] = {
+            "progress": page_num,
+            "total": total_pages,
+            "status": "running",
+            "encode_workers": workers,
+        }
+        for target in targets:
+            target.model.status = "embedding"
+            target.model.error_message = None
+            if not resume:
+                target.model.started_at = datetime.utcnow()
+        await self.db.commit()
+        self.cache = await self._open_cache(request)
+        await self._fit_projections(request, targets, page_size)
+
+        started = time.perf_counter()
+        async for page in self._iter_corpus_pages(page_size, after_id):
+            embeddings = await self._encode(request, [row.section_text for row in page])
+            for target in targets:
+                if page[-1].id <= target.after_id:
+                    continue
+                vectors = target.reducer.apply(embeddings) if target.reducer else embeddings
+                stats = await target.store.bulk_add(
+                    self._vector_rows(target.store, page, vectors, target.after_id)
+                )
+                target.inserted += stats.rows
+                target.insert_seconds += stats.seconds
+                target.insert_method = stats.method
+                # Vectors and the high-water mark are committed together, so
+                # the table's largest corpus_id is where an interrupted job
+                # left off.
+                target.model.last_corpus_id = page[-1].id
+                target.model.total_vectors = target.inserted
+            await self.db.commit()
+            page_num += 1
+            progress_store["embedding"]["progress"] = page_num
+            progress_store["embedding"]["texts_per_second"] = self._encode_rate()
+
+        vectors_reused, vectors_computed = self.reused, self.computed
+        encode_seconds, encode_rate = self.encode_seconds, self._encode_rate()
+        progress_store["embedding"]["status"] = "indexing"
+        index_stats = {}
+        for target in targets:
+            index_stats[target.model.id] = await target.store.finalize()
+            search_backend = get_vector_backend(self.db, target.model)
+            if isinstance(search_backend, LocalIndexBackend):
+                await search_backend.build()
+        progress_store["embedding"]["status"] = "embedding_queries"
+        query_started = time.perf_counter()
+        query_vectors = await self._embed_queries(request, targets, page_size)
+        query_seconds = time.perf_counter() - query_started
+
+        for target in targets:
+            inserted, insert_seconds = target.inserted, target.insert_seconds
+            target.model.status = "ready"
+            target.model.total_vectors = inserted
+            target.model.job_stats = {
+                "insert_method": target.insert_method,
+                "insert_seconds": round(insert_seconds, 3),
+                "insert_rows_per_second": round(inserted / insert_seconds, 1)
+                if insert_seconds
+                else 0.0,
+                "encode_workers": workers,
+                "encode_torch_threads": self.pool.torch_threads if self.pool else None,
+                "encode_seconds": round(encode_seconds, 3),
+                "encode_texts_per_second": encode_rate,
+                "encode_texts_per_second_per_worker": round(encode_rate / workers, 1),
+                "openai_requests": self.openai_client.requests_sent if self.openai_client else None,
+                "openai_retries": self.openai_client.retries if self.openai_client else None,
+                "vectors_reused": vectors_reused,
+                "vectors_computed": vectors_computed,
+                "projection_sample_vectors": self.sample_vectors,
+                "padding_ratio": round(1 - self.real_tokens / self.padded_tokens, 4)
+                if self.padded_tokens
+                else None,
+                "resumed_after_corpus_id": target.after_id if resume else None,
+                "stored_dimension": stored_dimension(target.model),
+                "query_vectors": query_vectors,
+                "query_seconds": round(query_seconds, 3),
+                "total_seconds": round(time.perf_counter() - started, 3),
+            }
+            target.model.index_build_seconds = round(index_stats[target.model.id].seconds, 3)
+            target.model.index_size_bytes = index_stats[target.model.id].size_bytes
+            target.model.completed_at = datetime.utcnow()
+            if self.openai_client is not None:
+                target.model.api_key_hash = _hash_api_key(_openai_api_key(request))
+        await self.db.commit()
+        progress_store["embedding"]["status"] = "completed"
+        return targets[0].inserted
+
+    async def mark_failed(self, model_id: int, exc: Exception) -> None:
+        await self.db.rollback()
+        for model_entry in [await self._get_model(model_id), *await self._get_variants(model_id)]:
+            model_entry.status = "error"
+            model_entry.error_message = str(exc)
+        await self.db.commit()
+        if "embedding" in progress_store:
+            progress_store["embedding"]["status"] = "error"
+
+    async def _target(self, model_entry: models.EmbeddingModel, resume: bool) -> _Target:
+        store = PgVectorBackend(self.db, model_entry)
+        target = _Target(model_entry, store, VectorReducer.for_model(model_entry))
+        if resume:
+            target.after_id = await self._resume_point(model_entry)
+            target.inserted = await store.storage.count_vectors(model_entry.table_name)
+        return target
+
+    async def _fit_projections(
+        self, request: EmbeddingModelCreate, targets: List[_Target], page_size: int
+    ) -> None:
+        """Fit PCA projections on a random corpus sample before any vectors are written.
+
+        The sample goes through the disk cache, so its encodings are reused
+        by the main pass instead of being computed twice.
+        """
+        unfitted = [t for t in targets if t.reducer is not None and not t.reducer.fitted]
+        if not unfitted:
+            return
+        progress_store["embedding"]["status"] = "fitting_projection"
+        sample_size = max(
+            int(t.model.config.get("pca_sample_size", DEFAULT_PCA_SAMPLE_SIZE)) for t in unfitted
+        )
+        result = await self.db.execute(
+            select(models.Corpus.section_text).order_by(func.random()).limit(sample_size)
+        )
+        texts = list(result.scalars().all())
+        with self._uncounted():
+            sample = np.vstack(
+                [
+                    await self._encode(request, texts[start : start + page_size])
+                    for start in range(0, len(texts), page_size)
+                ]
+            )
+        self.sample_vectors = len(texts)
+        loop = asyncio.get_running_loop()
+        for target in unfitted:
+            await loop.run_in_executor(None, target.reducer.fit, sample)
+            target.model.projection = target.reducer.to_bytes()
+        await self.db.commit()
+        progress_store["embedding"]["status"] = "running"
+
+    async def _resume_point(self, model_entry: models.EmbeddingModel) -> int:
+        result = await self.db.execute(
+            text(f"SELECT COALESCE(max(corpus_id), 0) FROM {model_entry.table_name}")
+        )
+        return max(int(result.scalar_one()), model_entry.last_corpus_id or 0)
+
+    async def _open_cache(self, request: EmbeddingModelCreate) -> Optional[EmbeddingDiskCache]:
+        if not request.config.get("embedding_cache", True):
+            return None
+        revision = request.config.get("model_revision")
+        if request.model_source.value == "openai":
+            revision = "openai"
+        elif not revision:
+            revision = await asyncio.get_running_loop().run_in_executor(
+                None, self.embedding_service.model_revision, request.model_name, self.pool
+            )
+        return EmbeddingDiskCache(
+            request.model_name, str(revision), bool(request.config.get("normalize", True))
+        )
+
+    async def _encode(self, request: EmbeddingModelCreate, texts: List[str]) -> np.ndarray:
+        missing = self.cache.missing(texts) if self.cache else list(range(len(texts)))
+        computed = None
+        if missing:
+            computed = await self._encode_uncached(request, [texts[idx] for idx in missing])
+        self.reused += len(texts) - len(missing)
+        self.computed += len(missing)
+        if self.cache is not None:
+            return self.cache.fill(texts, missing, computed)
+        return computed if computed is not None else np.zeros((0, 0), dtype=np.float32)
+
+    async def _encode_uncached(
+        self, request: EmbeddingModelCreate, texts: List[str]
+    ) -> np.ndarray:
+        started = time.perf_counter()
+        if request.model_source.value == "openai":
+            embeddings = await self._encode_openai(request, texts)
+        else:
+            # Encoding (or waiting on the pool) blocks for seconds per page;
+            # on a thread the loop keeps the job's heartbeat going.
+            embeddings = await asyncio.get_running_loop().run_in_executor(
+                None, self._encode_texts, request, texts
+            )
+        self.encode_seconds += time.perf_counter() - started
+        return embeddings
+
+    async def _encode_openai(self, request: EmbeddingModelCreate, texts: List[str]) -> np.ndarray:
+        if self.openai_client is None:
+            raise ValueError("OPENAI_API_KEY is not configured")
+        return await self.openai_client.embed(request.model_name, texts)
+
+    @contextmanager
+    def _uncounted(self) -> Iterator[None]:
+        """Leave encodes made inside the block out of the corpus pass's stats."""
+        counters = (
+            self.reused, self.computed, self.real_tokens, self.padded_tokens, self.encode_seconds
+        )
+        try:
+            yield
+        finally:
+            (
+                self.reused, self.computed, self.real_tokens, self.padded_tokens, self.encode_seconds
+            ) = counters
+
+    def _encode_rate(self) -> float:
+        return round(self.computed / self.encode_seconds, 1) if self.encode_seconds else 0.0
+
+    def _encode_texts(self, request: EmbeddingModelCreate, texts: List[str]) -> np.ndarray:
+        normalize = request.config.get("normalize", True)
+        max_tokens = int(request.config.get("max_batch_tokens", 16384))
+        if not max_tokens and self.pool is None:
+            return self.embedding_service.encode_batch(
+                request.model_name,
+                texts,
+                batch_size=request.config.get("batch_size", 32),
+                normalize=normalize,
+            )
+        if not max_tokens:
+            return self.embedding_service.encode_planned(
+                request.model_name,
+                texts,
+                BatchPlan.contiguous(len(texts), int(request.config.get("batch_size", 32))),
+                normalize=normalize,
+                pool=self.pool,
+            )
+        plan = self.embedding_service.plan_batches(
+            request.model_name,
+            texts,
+            max_tokens,
+            max_batch_size=int(request.config.get("max_batch_size", 256)),
+            pool=self.pool,
+        )
+        self.real_tokens += plan.real_tokens
+        self.padded_tokens += plan.padded_tokens
+        return self.embedding_service.encode_planned(
+            request.model_name, texts, plan, normalize=normalize, pool=self.pool
+        )
+
+    async def _embed_queries(
+        self, request: EmbeddingModelCreate, targets: List[_Target], page_size: int
+    ) -> int:
+        """Embed every query once so evaluations look vectors up instead of encoding."""
+        storage = VectorStorage(self.db)
+        table_names = [
+            await storage.create_query_vector_table(target.model.id, stored_dimension(target.model))
+            for target in targets
+        ]
+        result = await self.db.execute(
+            select(models.Query.query_uuid, models.Query.query_text).order_by(models.Query.id)
+        )
+        rows = result.all()
+        stored = 0
+        for start in range(0, len(rows), page_size):
+            page = rows[start : start + page_size]
+            with self._uncounted():
+                embeddings = await self._encode(request, [row.query_text for row in page])
+            query_uuids = [row.query_uuid for row in page]
+            for target, table_name in zip(targets, table_names):
+                vectors = target.reducer.apply(embeddings) if target.reducer else embeddings
+                await storage.bulk_insert_query_vectors(table_name, query_uuids, vectors)
+            stored += len(page)
+        return stored
+
+    def _vector_rows(
+        self,
+        store: PgVectorBackend,
+        page: Sequence[Row],
+        embeddings: np.ndarray,
+        after_id: int = 0,
+    ) -> List[VectorRow]:
+        store_payload = store.stores_payload
+        preview_chars = store.preview_chars
+        return [
+            VectorRow(
+                corpus_id=row.id,
+                doc_id=row.doc_id,
+                section_id=row.section_id,
+                embedding=embeddings[idx],
+                text_preview=row.section_text[:preview_chars] if store_payload else None,
+                section_length=len(row.section_text) if store_payload else None,
+            )
+            for idx, row in enumerate(page)
+            if row.id > after_id
+        ]
+
+    async def _iter_corpus_pages(
+        self, page_size: int, after_id: int = 0
+    ) -> AsyncIterator[Sequence[Row]]:
+        # Plain column rows rather than ORM entities, so nothing accumulates
+        # in the session identity map while the job runs.
+        last_id = after_id
+        while True:
+            result = await self.db.execute(
+                select(
+                    models.Corpus.id,
+                    models.Corpus.doc_id,
+                    models.Corpus.section_id,
+                    models.Corpus.section_text,
+                )
+                .where(models.Corpus.id > last_id)
+                .order_by(models.Corpus.id)
+                .limit(page_size)
+            )
+            page = result.all()
+            if not page:
+                return
+            yield page
+            last_id = page[-1].id
+
+    async def _count_corpus(self) -> int:
+        result = await self.db.execute(select(func.count(models.Corpus.id)))
+        return int(result.scalar_one() or 0)
+
+    async def _get_variants(self, model_id: int) -> List[models.EmbeddingModel]:
+        result = await self.db.execute(
+            select(models.EmbeddingModel)
+            .where(
+                models.EmbeddingModel.parent_model_id == model_id,
+                models.EmbeddingModel.status != "ready",
+            )
+            .order_by(models.EmbeddingModel.id)
+        )
+        return list(result.scalars().all())
+
+    async def _get_model(self, model_id: int) -> models.EmbeddingModel:
+        result = await self.db.execute(
+            select(models.EmbeddingModel).where(models.EmbeddingModel.id == model_id)
+        )
+        return result.scalar_one()
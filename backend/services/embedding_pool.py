@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterator, List, Optional
+
+import numpy as np
+
+_worker_model: Any = None
+
+
+def _init_worker(model_name: str, torch_threads: int) -> None:
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(torch_threads)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_in_worker(texts: List[str], normalize: bool) -> np.ndarray:
+    embeddings = _worker_model.encode(
+        texts,
+        batch_size=len(texts),
+        normalize_embeddings=normalize,
+        convert_to_numpy=True,
+    )
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+class EmbeddingPool:
+    """Worker processes that each hold a CPU copy of one embedding model.
+
+    Workers are spawned rather than forked so none inherits the parent's
+    torch thread pool, and each pins itself to ``torch_threads`` so the
+    pool as a whole does not oversubscribe the cores. The parent only loads
+    the tokenizer and config, for batch planning and the checkpoint revision.
+    """
+
+    def __init__(self, model_name: str, workers: int, torch_threads: Optional[int] = None) -> None:
+        self.model_name = model_name
+        self.workers = workers
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, self.torch_threads),
+        )
+        self._tokenizer: Any = None
+        self._max_length = 512
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """Token counts as the workers' models will see them, after truncation."""
+        tokenizer = self._load_tokenizer()
+        encoded = tokenizer(
+            texts, truncation=True, max_length=self._max_length, add_special_tokens=True
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def revision(self) -> str:
+        """Commit hash of the checkpoint, read from its config without loading weights."""
+        from transformers import AutoConfig
+
+        config = AutoConfig.from_pretrained(self.model_name)
+        return getattr(config, "_commit_hash", None) or "unknown"
+
+    def _load_tokenizer(self) -> Any:
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            from transformers.utils import cached_file
+
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            # SentenceTransformer truncates at max_seq_length from its own
+            # config, which is usually shorter than the tokenizer's limit.
+            config_path = cached_file(
+                self.model_name,
+                "sentence_bert_config.json",
+                _raise_exceptions_for_missing_entries=False,
+            )
+            max_length = None
+            if config_path:
+                with open(config_path, encoding="utf-8") as handle:
+                    max_length = json.load(handle).get("max_seq_length")
+            tokenizer_limit = getattr(self._tokenizer, "model_max_length", None) or 512
+            self._max_length = int(max_length or min(tokenizer_limit, 512))
+        return self._tokenizer
+
+    def map(self, batches: List[List[str]], normalize: bool = True) -> Iterator[np.ndarray]:
+        """Encode batches in parallel, yielding results in submission order."""
+        return self._executor.map(_encode_in_worker, batches, [normalize] * len(batches))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "EmbeddingPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
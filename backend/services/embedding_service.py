@@ -4,70 +4,194 @@ from dataclasses import dataclass
 from typing import Iterable, List, Optional
 
 import numpy as np
-from openai import OpenAI
 
 from backend.core.model_manager import ModelManager
-from backend.core.progress import progress_store
+from backend.core.query_cache import query_embedding_cache
+from backend.services.embedding_pool import EmbeddingPool
+from backend.services.openai_embeddings import OpenAIEmbeddingClient
 
 
 @dataclass
 class EmbeddingResult:
-    embeddings: List[List[float]]
+    embeddings: np.ndarray
     dimension: int
 
 
+@dataclass
+class BatchPlan:
+    """Encode batches as lists of indices into the input texts."""
+
+    batches: List[List[int]]
+    real_tokens: int = 0
+    padded_tokens: int = 0
+
+    @classmethod
+    def contiguous(cls, total: int, batch_size: int) -> "BatchPlan":
+        return cls([list(range(i, min(i + batch_size, total))) for i in range(0, total, batch_size)])
+
+    @classmethod
+    def by_length(
+        cls, lengths: List[int], max_tokens: int, max_batch_size: int = 256
+    ) -> "BatchPlan":
+        order = sorted(range(len(lengths)), key=lambda idx: lengths[idx], reverse=True)
+        plan = cls([])
+        batch: List[int] = []
+        longest = 0
+        for idx in order:
+            longest_with = max(longest, lengths[idx])
+            if batch and (
+                (len(batch) + 1) * longest_with > max_tokens or len(batch) >= max_batch_size
+            ):
+                plan.add(batch, [lengths[i] for i in batch])
+                batch, longest_with = [], lengths[idx]
+            batch.append(idx)
+            longest = longest_with
+        if batch:
+            plan.add(batch, [lengths[i] for i in batch])
+        return plan
+
+    def add(self, indices: List[int], lengths: List[int]) -> None:
+        self.batches.append(indices)
+        self.real_tokens += sum(lengths)
+        self.padded_tokens += len(lengths) * max(lengths)
+
+    @property
+    def padding_ratio(self) -> float:
+        """Share of encoded token positions that are padding."""
+        if not self.padded_tokens:
+            return 0.0
+        return 1 - self.real_tokens / self.padded_tokens
+
+
 class EmbeddingService:
     def __init__(self, model_manager: ModelManager) -> None:
         self.model_manager = model_manager
 
-    def embed_texts(
+    def plan_batches(
         self,
         model_name: str,
-        texts: Iterable[str],
+        texts: List[str],
+        max_tokens: int,
+        max_batch_size: int = 256,
+        pool: Optional[EmbeddingPool] = None,
+    ) -> BatchPlan:
+        """Group texts of similar token length under a padded-tokens budget.
+
+        Texts are sorted longest first and a batch is closed as soon as one
+        more member would push ``batch_len * longest_len`` over ``max_tokens``,
+        so short sections are no longer padded to the length of long ones.
+        With a ``pool`` only its tokenizer is used; no model is loaded here.
+        """
+        lengths = pool.token_lengths(texts) if pool else self.token_lengths(model_name, texts)
+        return BatchPlan.by_length(lengths, max_tokens, max_batch_size)
+
+    def token_lengths(self, model_name: str, texts: List[str]) -> List[int]:
+        loaded = self.model_manager.load_embedding_model(model_name)
+        tokenizer = getattr(loaded.model, "tokenizer", None)
+        max_length = getattr(loaded.model, "max_seq_length", None) or 512
+        if tokenizer is None:
+            return [min(len(text.split()) + 2, max_length) for text in texts]
+        encoded = tokenizer(texts, truncation=True, max_length=max_length, add_special_tokens=True)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def encode_planned(
+        self,
+        model_name: str,
+        texts: List[str],
+        plan: BatchPlan,
+        normalize: bool = True,
+        pool: Optional[EmbeddingPool] = None,
+    ) -> np.ndarray:
+        """Encode each planned batch and return rows in the original text order.
+
+        With a ``pool`` the batches are fanned out to its worker processes.
+        """
+        batches = [[texts[idx] for idx in indices] for indices in plan.batches]
+        if pool is not None:
+            batch_embeddings = list(pool.map(batches, normalize))
+        else:
+            batch_embeddings = [
+                self.encode_batch(model_name, batch, len(batch), normalize) for batch in batches
+            ]
+        return self._scatter(plan, batch_embeddings, len(texts))
+
+    def encode_batch(
+        self,
+        model_name: str,
+        texts: List[str],
         batch_size: int = 32,
         normalize: bool = True,
-    ) -> EmbeddingResult:
-        text_list = list(texts)
-        total_batches = (len(text_list) + batch_size - 1) // batch_size
-        progress_store["embedding"] = {"progress": 0, "total": total_batches, "status": "running"}
-        print(f"[EMBEDDING] Starting embedding for {len(text_list)} texts with model {model_name}, batch_size {batch_size}")
+    ) -> np.ndarray:
+        """Encode one batch into a float32 matrix without touching progress state."""
         loaded = self.model_manager.load_embedding_model(model_name)
-        all_embeddings = []
-        for i in range(0, len(text_list), batch_size):
-            batch = text_list[i:i + batch_size]
-            batch_num = i // batch_size + 1
-            print(f"[EMBEDDING] Processing batch {batch_num}/{total_batches}, size {len(batch)}")
-            progress_store["embedding"]["progress"] = batch_num
-            batch_embeddings = loaded.model.encode(
-                batch,
-                batch_size=batch_size,
-                normalize_embeddings=normalize,
-            )
-            all_embeddings.extend(batch_embeddings)
-        embeddings = np.asarray(all_embeddings)
-        progress_store["embedding"]["progress"] = total_batches
-        progress_store["embedding"]["status"] = "completed"
-        print(f"[EMBEDDING] Completed embedding, shape: {embeddings.shape}")
-        return EmbeddingResult(
-            embeddings=embeddings.tolist(),
-            dimension=embeddings.shape[1] if embeddings.ndim == 2 else 0,
+        embeddings = loaded.model.encode(
+            texts,
+            batch_size=batch_size,
+            normalize_embeddings=normalize,
+            convert_to_numpy=True,
         )
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def model_revision(self, model_name: str, pool: Optional[EmbeddingPool] = None) -> str:
+        """Commit hash of the loaded checkpoint, used to key the embedding cache."""
+        if pool is not None:
+            return pool.revision()
+        loaded = self.model_manager.load_embedding_model(model_name)
+        try:
+            auto_model = loaded.model[0].auto_model
+        except (AttributeError, IndexError, KeyError, TypeError):
+            return "unknown"
+        return getattr(auto_model.config, "_commit_hash", None) or "unknown"
+
+    async def encode_queries(
+        self, model_name: str, texts: List[str], normalize: bool = True
+    ) -> np.ndarray:
+        """Like ``encode_batch``, but served from the query cache where possible.
 
-    def embed_texts_openai(
+        Cache misses go through the model manager's micro-batcher, so
+        concurrent searches against the same model share one encode call.
+        """
+        keys = [query_embedding_cache.key(model_name, normalize, text) for text in texts]
+        cached = [query_embedding_cache.get(key) for key in keys]
+        missing = [idx for idx, vector in enumerate(cached) if vector is None]
+        if missing:
+            encoded = await self.model_manager.batched(
+                ("embedding", model_name, normalize),
+                [texts[idx] for idx in missing],
+                lambda batch: self.encode_batch(model_name, batch, len(batch), normalize),
+            )
+            for idx, vector in zip(missing, encoded):
+                query_embedding_cache.put(keys[idx], vector)
+                cached[idx] = vector
+        if not cached:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack(cached)
+
+    async def embed_texts_openai_async(
         self,
         model_name: str,
         texts: Iterable[str],
         api_key: str,
-        batch_size: int = 100,
+        max_concurrency: int = 4,
+        max_tokens_per_request: int = 100000,
+        max_inputs_per_request: int = 2048,
     ) -> EmbeddingResult:
-        if not api_key:
-            raise ValueError("OpenAI API key is required")
-        client = OpenAI(api_key=api_key)
-        vectors: List[List[float]] = []
-        text_list = list(texts)
-        for start in range(0, len(text_list), batch_size):
-            batch = text_list[start : start + batch_size]
-            response = client.embeddings.create(model=model_name, input=batch)
-            vectors.extend([item.embedding for item in response.data])
-        dimension = len(vectors[0]) if vectors else 0
-        return EmbeddingResult(embeddings=vectors, dimension=dimension)
+        async with OpenAIEmbeddingClient(
+            api_key,
+            max_concurrency=max_concurrency,
+            max_tokens_per_request=max_tokens_per_request,
+            max_inputs_per_request=max_inputs_per_request,
+        ) as client:
+            embeddings = await client.embed(model_name, list(texts))
+        dimension = embeddings.shape[1] if embeddings.ndim == 2 else 0
+        return EmbeddingResult(embeddings=embeddings, dimension=dimension)
+
+    def _scatter(
+        self, plan: BatchPlan, batch_embeddings: List[np.ndarray], total: int
+    ) -> np.ndarray:
+        if not batch_embeddings:
+            return np.zeros((0, 0), dtype=np.float32)
+        embeddings = np.empty((total, batch_embeddings[0].shape[1]), dtype=np.float32)
+        for indices, batch in zip(plan.batches, batch_embeddings):
+            embeddings[indices] = batch
+        return embeddings
@@ -3,18 +3,26 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime
 import random
-from typing import Iterable, List, Optional
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.core.model_manager import ModelManager
 from backend.models import database as models
 from backend.models.schemas import EvaluationRunCreate
+from backend.services.corpus_service import CorpusService
 from backend.services.generation_service import GenerationService
 from backend.services.judge_service import JudgeService
 from backend.services.metrics_service import MetricsService, RetrievalMetrics
+from backend.services.reranker_service import RerankSettings
 from backend.services.retrieval_pipeline import RetrievalPipeline
+from backend.services.vector_storage import VectorStorage
+
+# Queries retrieved together per batched search; bounds how much retrieval
+# work is done ahead of generation and judging.
+RETRIEVAL_BATCH_SIZE = 64
 
 
 @dataclass
@@ -33,15 +41,36 @@ class EvaluationService:
         self.generation_service = GenerationService()
         self.judge_service = JudgeService()
         self.metrics_service = MetricsService()
+        self.corpus_service = CorpusService(db)
+        self.vector_storage = VectorStorage(db)
 
     async def create_run(self, config: EvaluationRunCreate) -> models.EvaluationRun:
         return await self._create_run_entry(config)
 
     async def run_evaluation_async(self, config: EvaluationRunCreate, run_id: int) -> None:
+        pinned = []
+        if config.use_reranker and config.reranker_config:
+            rerank_settings = RerankSettings.from_config(config.reranker_config.config)
+            pinned.append(
+                ModelManager.reranker_key(
+                    config.reranker_config.model_name, rerank_settings.max_length
+                )
+            )
+        # The reranker stays loaded for the whole run even if other requests
+        # push the model manager over its memory budget.
+        with self.model_manager.pinned(*pinned):
+            await self._run_evaluation(config, run_id)
+
+    async def _run_evaluation(self, config: EvaluationRunCreate, run_id: int) -> None:
         run_result = await self.db.execute(
             select(models.EvaluationRun).where(models.EvaluationRun.id == run_id)
         )
         run = run_result.scalar_one()
+        # A run picked up again after its worker died starts over; results
+        # from the earlier attempt (and their judge scores, by cascade) go.
+        await self.db.execute(
+            delete(models.EvaluationResult).where(models.EvaluationResult.run_id == run_id)
+        )
         retrieval_metrics_list: List[RetrievalMetrics] = []
         track_a_scores: List[dict] = []
         track_b_scores: List[dict] = []
@@ -50,23 +79,17 @@ class EvaluationService:
 
         try:
             queries = await self._select_queries(config.sample_size, config.sample_seed)
-            for query in queries:
+            async for query, pipeline_result in self._iter_retrievals(config, queries):
                 reference_answer = await self._get_reference_answer(query.query_uuid)
                 qrels = await self._get_qrels(query.query_uuid)
 
-                pipeline_result = await self.retrieval_pipeline.retrieve(
-                    model_id=config.embedding_model_id,
-                    query_text=query.query_text,
-                    retrieval_top_k=config.retrieval_top_k,
-                    use_reranker=config.use_reranker,
-                    reranker_model_name=self._reranker_name(config),
-                    reranker_top_k=self._reranker_top_k(config),
-                )
                 retrieved = pipeline_result["retrieved"]
                 reranked = pipeline_result["reranked"]
                 final_docs = reranked if reranked else retrieved
 
-                context_entries = await self._fetch_context_entries(final_docs)
+                context_entries = await self._fetch_context_entries(
+                    final_docs, pipeline_result["documents"]
+                )
                 contexts = [entry["text"] for entry in context_entries]
                 context_text = "\n\n".join(contexts)
 
@@ -157,6 +180,11 @@ class EvaluationService:
                 "track_a": self.metrics_service.aggregate_track_a(track_a_scores),
                 "track_b": self.metrics_service.aggregate_track_b(track_b_scores),
             }
+            if config.use_reranker:
+                run.run_stats = {
+                    "reranker_score_cache": self.retrieval_pipeline.rerank_cache_summary(),
+                    "reranker_padding_ratio": self.retrieval_pipeline.reranker_service.padding_ratio,
+                }
             run.total_judge_input_tokens = total_judge_input
             run.total_judge_output_tokens = total_judge_output
             run.status = "completed"
@@ -169,12 +197,48 @@ class EvaluationService:
             await self.db.commit()
             # Do not raise, since it's background
 
+    async def _iter_retrievals(
+        self, config: EvaluationRunCreate, queries: List[models.Query]
+    ) -> AsyncIterator[Tuple[models.Query, dict]]:
+        for start in range(0, len(queries), RETRIEVAL_BATCH_SIZE):
+            batch = queries[start : start + RETRIEVAL_BATCH_SIZE]
+            query_embeddings = await self._stored_query_embeddings(
+                config.embedding_model_id, batch
+            )
+            pipeline_results = await self.retrieval_pipeline.retrieve_batch(
+                model_id=config.embedding_model_id,
+                query_texts=[query.query_text for query in batch],
+                retrieval_top_k=config.retrieval_top_k,
+                use_reranker=config.use_reranker,
+                reranker_model_name=self._reranker_name(config),
+                reranker_top_k=self._reranker_top_k(config),
+                ef_search=config.ef_search,
+                query_embeddings=query_embeddings,
+                reranker_config=config.reranker_config.config if config.reranker_config else None,
+            )
+            for query, pipeline_result in zip(batch, pipeline_results):
+                yield query, pipeline_result
+
+    async def _stored_query_embeddings(
+        self, model_id: int, batch: List[models.Query]
+    ) -> Optional[np.ndarray]:
+        # Vectors precomputed when the model was built; encode on the fly
+        # only if any query in the batch is missing (e.g. after re-ingestion).
+        stored = await self.vector_storage.fetch_query_vectors(
+            self.vector_storage.query_table_name(model_id),
+            [query.query_uuid for query in batch],
+        )
+        if any(query.query_uuid not in stored for query in batch):
+            return None
+        return np.stack([stored[query.query_uuid] for query in batch])
+
     async def _create_run_entry(self, config: EvaluationRunCreate) -> models.EvaluationRun:
         reranker_config = config.reranker_config.model_dump() if config.reranker_config else None
         run = models.EvaluationRun(
             run_name=config.run_name,
             embedding_model_id=config.embedding_model_id,
             retrieval_top_k=config.retrieval_top_k,
+            ef_search=config.ef_search,
             use_reranker=config.use_reranker,
             reranker_model_name=self._reranker_name(config),
             reranker_top_k=self._reranker_top_k(config) if config.use_reranker else None,
@@ -222,31 +286,25 @@ class EvaluationService:
             for row in rows
         ]
 
-    async def _fetch_context_entries(self, items: Iterable[dict]) -> List[dict]:
-        entries: List[dict] = []
-        for item in items:
-            result = await self.db.execute(
-                select(models.Corpus).where(
-                    models.Corpus.doc_id == item.get("doc_id"),
-                    models.Corpus.section_id == item.get("section_id"),
-                )
-            )
-            row = result.scalar_one_or_none()
-            if row is None:
-                continue
-            entries.append(
-                {
-                    "doc_id": row.doc_id,
-                    "section_id": row.section_id,
-                    "text": self._format_context_text(row),
-                }
-            )
-        return entries
+    async def _fetch_context_entries(
+        self, items: Iterable[dict], known_sections: Dict[int, dict]
+    ) -> List[dict]:
+        items = list(items)
+        missing = [item["corpus_id"] for item in items if item["corpus_id"] not in known_sections]
+        sections = {**known_sections, **await self.corpus_service.fetch_sections(missing)}
+        return [
+            {
+                "doc_id": section["doc_id"],
+                "section_id": section["section_id"],
+                "text": self._format_context_text(section),
+            }
+            for section in self.corpus_service.in_order(items, sections)
+        ]
 
-    def _format_context_text(self, row: models.Corpus) -> str:
-        if row.tables_markdown:
-            return f"{row.section_text}\n\n{row.tables_markdown}"
-        return row.section_text
+    def _format_context_text(self, section: dict) -> str:
+        if section["tables_markdown"]:
+            return f"{section['text']}\n\n{section['tables_markdown']}"
+        return section["text"]
 
     def _reranker_name(self, config: EvaluationRunCreate) -> Optional[str]:
         if not config.use_reranker:
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+
+class ExactVectorIndex:
+    """Exact cosine search over a memory-mapped float32 matrix.
+
+    Rows are L2-normalised when the index is built, so cosine similarity is
+    a plain dot product. The matrix is scanned in blocks to bound the size
+    of the intermediate score matrix.
+    """
+
+    def __init__(self, directory: Path, block_rows: int = 65536) -> None:
+        self.directory = directory
+        self.block_rows = block_rows
+        self.embeddings = np.load(directory / "embeddings.npy", mmap_mode="r")
+        self.corpus_ids = np.load(directory / "corpus_ids.npy", mmap_mode="r")
+        self.section_ids = np.load(directory / "section_ids.npy", mmap_mode="r")
+        self.doc_ids = np.load(directory / "doc_ids.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return int(self.embeddings.shape[0])
+
+    def search(self, query: Sequence[float], top_k: int) -> List[dict]:
+        return self.batch_search(np.asarray(query, dtype=np.float32)[None, :], top_k)[0]
+
+    def batch_search(self, queries: np.ndarray, top_k: int) -> List[List[dict]]:
+        queries = normalize_rows(np.asarray(queries, dtype=np.float32))
+        num_queries = queries.shape[0]
+        best_scores = np.empty((num_queries, 0), dtype=np.float32)
+        best_rows = np.empty((num_queries, 0), dtype=np.int64)
+
+        for start in range(0, len(self), self.block_rows):
+            block = np.asarray(self.embeddings[start : start + self.block_rows])
+            scores = queries @ block.T
+            k = min(top_k, scores.shape[1])
+            rows = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores = np.concatenate(
+                [best_scores, np.take_along_axis(scores, rows, axis=1)], axis=1
+            )
+            best_rows = np.concatenate([best_rows, rows + start], axis=1)
+            if best_scores.shape[1] > top_k:
+                keep = np.argpartition(-best_scores, top_k - 1, axis=1)[:, :top_k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return [
+            self.format_results(rows, scores) for rows, scores in zip(best_rows, best_scores)
+        ]
+
+    def format_results(self, rows: np.ndarray, scores: np.ndarray) -> List[dict]:
+        return [
+            {
+                "corpus_id": int(self.corpus_ids[row]),
+                "doc_id": str(self.doc_ids[row]),
+                "section_id": int(self.section_ids[row]),
+                "score": float(score),
+            }
+            for row, score in zip(rows, scores)
+        ]
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
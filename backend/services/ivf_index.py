@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from backend.services.exact_search import ExactVectorIndex, normalize_rows
+
+# Rows k-means is fitted on; ``ivf_lists`` cannot exceed it.
+IVF_SAMPLE_SIZE = 50000
+
+
+class IVFVectorIndex(ExactVectorIndex):
+    """Inverted-file ANN index over the same on-disk layout as the exact index.
+
+    ``build`` clusters the normalised rows with spherical k-means and
+    rewrites the row files grouped by cluster, so each inverted list is a
+    contiguous slice of the memory-mapped matrix. A search scores the
+    centroids and scans only the ``nprobe`` closest lists.
+    """
+
+    def __init__(self, directory: Path, nprobe: int = 8) -> None:
+        super().__init__(directory)
+        self.nprobe = nprobe
+        self.centroids = np.load(directory / "ivf_centroids.npy")
+        self.offsets = np.load(directory / "ivf_offsets.npy")
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    def search(
+        self, query: Sequence[float], top_k: int, nprobe: Optional[int] = None
+    ) -> List[dict]:
+        return self.batch_search(np.asarray(query, dtype=np.float32)[None, :], top_k, nprobe)[0]
+
+    def batch_search(
+        self, queries: np.ndarray, top_k: int, nprobe: Optional[int] = None
+    ) -> List[List[dict]]:
+        queries = normalize_rows(np.asarray(queries, dtype=np.float32))
+        if self.nlist == 0:
+            return [[] for _ in range(queries.shape[0])]
+        probes = min(nprobe or self.nprobe, self.nlist)
+        centroid_scores = queries @ self.centroids.T
+        probed_lists = np.argpartition(-centroid_scores, probes - 1, axis=1)[:, :probes]
+
+        results: List[List[dict]] = []
+        for query, lists in zip(queries, probed_lists):
+            rows = np.concatenate(
+                [np.arange(self.offsets[idx], self.offsets[idx + 1]) for idx in lists]
+            )
+            if rows.size == 0:
+                results.append([])
+                continue
+            scores = np.asarray(self.embeddings[rows]) @ query
+            k = min(top_k, rows.size)
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            results.append(self.format_results(rows[best], scores[best]))
+        return results
+
+    @staticmethod
+    def build(
+        directory: Path,
+        nlist: Optional[int] = None,
+        iterations: int = 10,
+        sample_size: int = IVF_SAMPLE_SIZE,
+        block_rows: int = 65536,
+        seed: int = 0,
+    ) -> None:
+        embeddings = np.load(directory / "embeddings.npy", mmap_mode="r")
+        total = int(embeddings.shape[0])
+        if total == 0:
+            np.save(directory / "ivf_centroids.npy", np.zeros((0, embeddings.shape[1]), np.float32))
+            np.save(directory / "ivf_offsets.npy", np.zeros(1, dtype=np.int64))
+            return
+        nlist = min(nlist or max(1, int(4 * math.sqrt(total))), total)
+
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(total, size=min(sample_size, total), replace=False))
+        sample = np.asarray(embeddings[sample_rows])
+        centroids = _spherical_kmeans(sample, nlist, iterations, rng)
+
+        assignments = np.empty(total, dtype=np.int64)
+        for start in range(0, total, block_rows):
+            block = np.asarray(embeddings[start : start + block_rows])
+            assignments[start : start + block_rows] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=nlist))])
+
+        reordered = np.lib.format.open_memmap(
+            directory / "embeddings.ivf.npy", mode="w+", dtype=np.float32, shape=embeddings.shape
+        )
+        for start in range(0, total, block_rows):
+            reordered[start : start + block_rows] = embeddings[order[start : start + block_rows]]
+        reordered.flush()
+        del reordered, embeddings
+        (directory / "embeddings.ivf.npy").replace(directory / "embeddings.npy")
+
+        for name in ("corpus_ids", "section_ids", "doc_ids"):
+            values = np.load(directory / f"{name}.npy")
+            np.save(directory / f"{name}.npy", values[order])
+        np.save(directory / "ivf_centroids.npy", centroids)
+        np.save(directory / "ivf_offsets.npy", offsets.astype(np.int64))
+
+
+def _spherical_kmeans(
+    sample: np.ndarray, clusters: int, iterations: int, rng: np.random.Generator
+) -> np.ndarray:
+    centroids = sample[rng.choice(sample.shape[0], size=clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=clusters)
+        non_empty = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)])[non_empty]
+        # Empty clusters keep their previous centroid.
+        centroids[non_empty] = np.add.reduceat(sample[order], starts, axis=0)
+        centroids = normalize_rows(centroids)
+    return centroids.astype(np.float32)
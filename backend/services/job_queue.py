@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import settings
+from backend.models import database as models
+
+JOB_TYPES = ("embedding", "ingestion", "evaluation")
+FINISHED_STATUSES = ("completed", "error", "cancelled")
+SECRET_KEYS = ("api_key",)
+
+
+def scrub_secrets(value: Any) -> Any:
+    """Copy of a payload with API keys blanked out."""
+    if isinstance(value, dict):
+        return {
+            key: None if key in SECRET_KEYS else scrub_secrets(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [scrub_secrets(item) for item in value]
+    return value
+
+
+class JobQueue:
+    """Postgres-backed job queue shared by the API and worker processes.
+
+    Workers claim jobs with ``FOR UPDATE SKIP LOCKED``, so any number of
+    them can poll the same table. A running job whose heartbeat is older
+    than ``job_stale_seconds`` is treated as abandoned and can be claimed
+    again.
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def enqueue(self, job_type: str, payload: Dict[str, Any]) -> models.Job:
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type}")
+        job = models.Job(job_type=job_type, payload=payload, status="queued")
+        self.db.add(job)
+        await self.db.flush()
+        return job
+
+    async def get(self, job_id: int) -> Optional[models.Job]:
+        result = await self.db.execute(select(models.Job).where(models.Job.id == job_id))
+        return result.scalar_one_or_none()
+
+    async def list_jobs(self, limit: int = 50, status: Optional[str] = None) -> List[models.Job]:
+        query = select(models.Job).order_by(models.Job.id.desc()).limit(limit)
+        if status:
+            query = query.where(models.Job.status == status)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
+    async def active_embedding_job(self, model_id: int) -> Optional[models.Job]:
+        """The queued or live running embedding job for ``model_id``, if there is one.
+
+        A running job whose heartbeat has gone stale has no worker behind it
+        and does not count.
+        """
+        result = await self.db.execute(
+            select(models.Job)
+            .where(
+                models.Job.job_type == "embedding",
+                or_(
+                    models.Job.status == "queued",
+                    (models.Job.status == "running")
+                    & (models.Job.heartbeat_at >= _stale_before()),
+                ),
+                models.Job.payload["model_id"].as_integer() == model_id,
+            )
+            .order_by(models.Job.id.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def claim(
+        self, worker_id: str, job_types: Optional[List[str]] = None
+    ) -> Optional[models.Job]:
+        stale_before = _stale_before()
+        await self._cancel_orphans(stale_before)
+        query = (
+            select(models.Job)
+            .where(
+                models.Job.cancel_requested.is_(False),
+                or_(
+                    models.Job.status == "queued",
+                    (models.Job.status == "running") & (models.Job.heartbeat_at < stale_before),
+                ),
+            )
+            .order_by(models.Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if job_types:
+            query = query.where(models.Job.job_type.in_(job_types))
+        result = await self.db.execute(query)
+        job = result.scalar_one_or_none()
+        if job is None:
+            await self.db.rollback()
+            return None
+        now = datetime.utcnow()
+        job.status = "running"
+        job.worker_id = worker_id
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = job.started_at or now
+        job.heartbeat_at = now
+        await self.db.commit()
+        return job
+
+    async def heartbeat(
+        self, job_id: int, worker_id: str, progress: Optional[dict] = None
+    ) -> Optional[bool]:
+        """Refresh the job's heartbeat if ``worker_id`` still holds it.
+
+        Returns whether cancellation was requested, or None when the job has
+        been reclaimed by another worker and the caller should stop running it.
+        """
+        values: Dict[str, Any] = {"heartbeat_at": datetime.utcnow()}
+        if progress is not None:
+            values["progress"] = progress
+        result = await self.db.execute(
+            update(models.Job)
+            .where(self._held_by(job_id, worker_id))
+            .values(**values)
+            .returning(models.Job.cancel_requested)
+        )
+        cancel_requested = result.scalar_one_or_none()
+        await self.db.commit()
+        return None if cancel_requested is None else bool(cancel_requested)
+
+    async def finish(
+        self,
+        job_id: int,
+        worker_id: str,
+        status: str,
+        result: Optional[dict] = None,
+        error_message: Optional[str] = None,
+        progress: Optional[dict] = None,
+    ) -> bool:
+        """Record the outcome; False when ``worker_id`` no longer holds the job."""
+        job = await self.get(job_id)
+        if job is None or job.worker_id != worker_id or job.status != "running":
+            await self.db.rollback()
+            return False
+        values: Dict[str, Any] = {
+            "status": status,
+            "result": result,
+            "error_message": error_message,
+            "completed_at": datetime.utcnow(),
+            # API keys are only needed while the job runs.
+            "payload": scrub_secrets(job.payload),
+        }
+        if progress is not None:
+            values["progress"] = progress
+        updated = await self.db.execute(
+            update(models.Job)
+            .where(self._held_by(job_id, worker_id))
+            .values(**values)
+            .returning(models.Job.id)
+        )
+        finished = updated.scalar_one_or_none() is not None
+        await self.db.commit()
+        return finished
+
+    async def is_held_by(self, job_id: int, worker_id: str) -> bool:
+        result = await self.db.execute(select(models.Job.id).where(self._held_by(job_id, worker_id)))
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    def _held_by(job_id: int, worker_id: str):
+        # A reclaimed job has a new worker_id, so writes from the worker that
+        # lost it match no rows.
+        return (
+            (models.Job.id == job_id)
+            & (models.Job.worker_id == worker_id)
+            & (models.Job.status == "running")
+        )
+
+    async def request_cancel(self, job_id: int) -> Optional[models.Job]:
+        job = await self.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+        job.cancel_requested = True
+        # A queued job, or a running one whose worker has died, has nobody
+        # to act on the flag, so it is cancelled here.
+        if job.status == "queued" or _is_stale(job):
+            self._mark_cancelled(job)
+        await self.db.commit()
+        return job
+
+    async def _cancel_orphans(self, stale_before: datetime) -> None:
+        """Cancel stale running jobs whose cancellation nobody is left to carry out."""
+        result = await self.db.execute(
+            select(models.Job)
+            .where(
+                models.Job.status == "running",
+                models.Job.cancel_requested.is_(True),
+                models.Job.heartbeat_at < stale_before,
+            )
+            .with_for_update(skip_locked=True)
+        )
+        orphans = list(result.scalars().all())
+        for job in orphans:
+            self._mark_cancelled(job)
+        if orphans:
+            await self.db.commit()
+
+    @staticmethod
+    def _mark_cancelled(job: models.Job) -> None:
+        job.status = "cancelled"
+        job.completed_at = datetime.utcnow()
+        job.payload = scrub_secrets(job.payload)
+
+    async def latest_progress(self) -> Dict[str, dict]:
+        """Most recent progress snapshot per job type."""
+        result = await self.db.execute(
+            select(models.Job.job_type, models.Job.progress)
+            .where(models.Job.progress.is_not(None))
+            .order_by(models.Job.job_type, models.Job.id.desc())
+            .distinct(models.Job.job_type)
+        )
+        return {row.job_type: row.progress for row in result.all()}
+
+
+def _stale_before() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=settings.job_stale_seconds)
+
+
+def _is_stale(job: models.Job) -> bool:
+    return (
+        job.status == "running"
+        and job.heartbeat_at is not None
+        and job.heartbeat_at < _stale_before()
+    )
+
+
+def serialize_job(job: models.Job) -> dict:
+    return {
+        "id": job.id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "cancel_requested": job.cancel_requested,
+        "attempts": job.attempts,
+        "worker_id": job.worker_id,
+        "progress": job.progress,
+        "result": job.result,
+        "error_message": job.error_message,
+        "payload": scrub_secrets(job.payload),
+        "heartbeat_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+    }
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Any, Callable, List, Optional
+
+import httpx
+import numpy as np
+
+from backend.config import settings
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _token_counter(model_name: str) -> Callable[[str], int]:
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        # Roughly four characters per token for English text.
+        return lambda text: len(text) // 4 + 1
+
+
+class OpenAIEmbeddingClient:
+    """Async client for the embeddings endpoint with bounded concurrency.
+
+    Inputs are packed into requests under both a token budget and an input
+    count limit. Up to ``max_concurrency`` requests are in flight at once.
+    Rate-limited and transient failures are retried, honouring
+    ``Retry-After``. Rows come back in input order. One client keeps its
+    HTTP connections open across ``embed`` calls until ``aclose``.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 4,
+        max_tokens_per_request: int = 100000,
+        max_inputs_per_request: int = 2048,
+        max_retries: int = 6,
+        timeout: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        if not api_key:
+            raise ValueError("OpenAI API key is required")
+        self.api_key = api_key
+        self.base_url = (base_url or settings.openai_base_url).rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.max_tokens_per_request = max_tokens_per_request
+        self.max_inputs_per_request = max_inputs_per_request
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.transport = transport
+        self.requests_sent = 0
+        self.retries = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "OpenAIEmbeddingClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def plan_requests(self, model_name: str, texts: List[str]) -> List[List[int]]:
+        count_tokens = _token_counter(model_name)
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        batch_tokens = 0
+        for idx, text in enumerate(texts):
+            tokens = count_tokens(text)
+            if batch and (
+                batch_tokens + tokens > self.max_tokens_per_request
+                or len(batch) >= self.max_inputs_per_request
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(idx)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def embed(self, model_name: str, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        batches = self.plan_requests(model_name, texts)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+        client = self._client
+
+        async def run(indices: List[int]) -> List[List[float]]:
+            async with semaphore:
+                return await self._post(client, model_name, [texts[idx] for idx in indices])
+
+        results = await asyncio.gather(*(run(indices) for indices in batches))
+
+        embeddings = np.empty((len(texts), len(results[0][0])), dtype=np.float32)
+        for indices, vectors in zip(batches, results):
+            embeddings[indices] = vectors
+        return embeddings
+
+    async def _post(
+        self, client: httpx.AsyncClient, model_name: str, batch: List[str]
+    ) -> List[List[float]]:
+        attempt = 0
+        while True:
+            self.requests_sent += 1
+            try:
+                response = await client.post(
+                    "/embeddings", json={"model": model_name, "input": batch}
+                )
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = None
+            else:
+                if response.status_code < 400:
+                    data = sorted(response.json()["data"], key=lambda item: item["index"])
+                    return [item["embedding"] for item in data]
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    raise ValueError(
+                        f"OpenAI embeddings request failed ({response.status_code}): "
+                        f"{response.text[:500]}"
+                    )
+                delay = self._retry_after(response)
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay if delay is not None else self._backoff(attempt))
+
+    def _retry_after(self, response: httpx.Response) -> Optional[float]:
+        retry_after_ms = response.headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return float(retry_after_ms) / 1000
+            except ValueError:
+                pass
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                return None
+        return None
+
+    def _backoff(self, attempt: int) -> float:
+        return min(60.0, 2 ** (attempt - 1)) * (0.5 + random.random() / 2)
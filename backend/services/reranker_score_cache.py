@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.score_cache import ScoreKey, reranker_score_cache
+from backend.models import database as models
+
+# Both sized to stay under asyncpg's 32767 bind parameters per statement.
+FLUSH_CHUNK_ROWS = 5000
+LOAD_CHUNK_KEYS = 10000
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class RerankerScoreCache:
+    """Cross-encoder scores for one reranker, backed by the ``reranker_scores`` table.
+
+    ``load`` resolves a batch of (query, corpus id) pairs from the in-process
+    LRU and then Postgres; the reranker only scores what is still missing,
+    and ``flush`` writes those new scores to both tiers.
+    """
+
+    def __init__(self, db: AsyncSession, model_key: str) -> None:
+        self.db = db
+        self.model_key = model_key
+        self._scores: Dict[ScoreKey, float] = {}
+        self._pending: Dict[ScoreKey, float] = {}
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.computed = 0
+
+    def key(self, query: str, corpus_id: int) -> ScoreKey:
+        return (self.model_key, query_hash(query), int(corpus_id))
+
+    async def load(self, pairs: Iterable[Tuple[str, int]]) -> None:
+        unresolved: List[ScoreKey] = []
+        seen = set()
+        for query, corpus_id in pairs:
+            key = self.key(query, corpus_id)
+            if key in self._scores or key in seen:
+                continue
+            score = reranker_score_cache.get(key)
+            if score is None:
+                unresolved.append(key)
+                seen.add(key)
+            else:
+                self._scores[key] = score
+                self.memory_hits += 1
+        if not unresolved:
+            return
+        found = []
+        for start in range(0, len(unresolved), LOAD_CHUNK_KEYS):
+            chunk = unresolved[start : start + LOAD_CHUNK_KEYS]
+            result = await self.db.execute(
+                select(
+                    models.RerankerScore.query_hash,
+                    models.RerankerScore.corpus_id,
+                    models.RerankerScore.score,
+                ).where(
+                    models.RerankerScore.model_key == self.model_key,
+                    tuple_(models.RerankerScore.query_hash, models.RerankerScore.corpus_id).in_(
+                        [(key[1], key[2]) for key in chunk]
+                    ),
+                )
+            )
+            for row in result.all():
+                key = (self.model_key, row.query_hash, row.corpus_id)
+                self._scores[key] = row.score
+                found.append((key, row.score))
+        reranker_score_cache.put_many(found)
+        self.db_hits += len(found)
+
+    def lookup(self, query: str, corpus_ids: Iterable[int]) -> Dict[int, float]:
+        scores = {}
+        for corpus_id in corpus_ids:
+            score = self._scores.get(self.key(query, corpus_id))
+            if score is not None:
+                scores[corpus_id] = score
+        return scores
+
+    def store(self, query: str, scores: Dict[int, float]) -> None:
+        for corpus_id, score in scores.items():
+            key = self.key(query, corpus_id)
+            self._scores[key] = self._pending[key] = float(score)
+        self.computed += len(scores)
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        reranker_score_cache.put_many(self._pending.items())
+        rows = [
+            {"model_key": key[0], "query_hash": key[1], "corpus_id": key[2], "score": score}
+            for key, score in self._pending.items()
+        ]
+        # Written on a session of its own, so the caller's transaction is
+        # neither committed early nor needed to persist the scores.
+        async with AsyncSession(self.db.bind) as session:
+            for start in range(0, len(rows), FLUSH_CHUNK_ROWS):
+                await session.execute(
+                    insert(models.RerankerScore)
+                    .values(rows[start : start + FLUSH_CHUNK_ROWS])
+                    .on_conflict_do_nothing()
+                )
+            await session.commit()
+        self._pending.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.memory_hits + self.db_hits + self.computed
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "computed": self.computed,
+            "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from backend.core.model_manager import ModelManager
+from backend.core.model_manager import LoadedModel, ModelManager
+from backend.services.embedding_service import BatchPlan
+from backend.services.reranker_score_cache import RerankerScoreCache
+
+DEFAULT_MAX_BATCH_TOKENS = 16384
+DEFAULT_MAX_BATCH_SIZE = 64
 
 
 @dataclass
@@ -14,9 +19,34 @@ class RerankResult:
     score: float
 
 
+@dataclass(frozen=True)
+class RerankSettings:
+    """Per-reranker inference limits, read from ``RerankerConfig.config``."""
+
+    max_length: Optional[int] = None
+    max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "RerankSettings":
+        config = config or {}
+        max_length = config.get("max_length")
+        return cls(
+            max_length=int(max_length) if max_length else None,
+            max_batch_tokens=int(config.get("max_batch_tokens", DEFAULT_MAX_BATCH_TOKENS)),
+            max_batch_size=int(config.get("max_batch_size", DEFAULT_MAX_BATCH_SIZE)),
+        )
+
+    def model_key(self, model_name: str) -> str:
+        """Score-cache key; scores depend on how far pairs are truncated."""
+        return f"{model_name}@{self.max_length}" if self.max_length else model_name
+
+
 class RerankerService:
     def __init__(self, model_manager: ModelManager) -> None:
         self.model_manager = model_manager
+        self.real_tokens = 0
+        self.padded_tokens = 0
 
     def rerank(
         self,
@@ -24,18 +54,150 @@ class RerankerService:
         query: str,
         documents: List[dict],
         top_k: int = 5,
+        score_cache: Optional[RerankerScoreCache] = None,
+        settings: Optional[RerankSettings] = None,
     ) -> List[RerankResult]:
-        loaded = self.model_manager.load_reranker_model(model_name)
-        pairs = [(query, doc["text"]) for doc in documents]
-        scores = loaded.model.predict(pairs)
-        scored = [
-            RerankResult(
-                corpus_id=doc["corpus_id"],
-                doc_id=doc["doc_id"],
-                section_id=doc["section_id"],
-                score=float(score),
+        return self.rerank_batch(
+            model_name, [(query, documents)], top_k, score_cache=score_cache, settings=settings
+        )[0]
+
+    def rerank_batch(
+        self,
+        model_name: str,
+        groups: Sequence[Tuple[str, List[dict]]],
+        top_k: int = 5,
+        score_cache: Optional[RerankerScoreCache] = None,
+        settings: Optional[RerankSettings] = None,
+    ) -> List[List[RerankResult]]:
+        """Rerank many (query, candidates) groups with shared inference batches.
+
+        Unscored pairs from every group are flattened, bucketed by token
+        length under ``max_batch_tokens`` and scored together; each group's
+        top ``top_k`` comes back in input order.
+        """
+        settings = settings or RerankSettings()
+        known, owners, pairs = self._unscored(groups, score_cache)
+        scored = self._predict(model_name, pairs, settings) if pairs else []
+        return self._assemble(groups, known, owners, self._account(scored), top_k, score_cache)
+
+    async def rerank_batch_async(
+        self,
+        model_name: str,
+        groups: Sequence[Tuple[str, List[dict]]],
+        top_k: int = 5,
+        score_cache: Optional[RerankerScoreCache] = None,
+        settings: Optional[RerankSettings] = None,
+    ) -> List[List[RerankResult]]:
+        """``rerank_batch`` with the pairs scored through the model manager's
+        micro-batcher, so concurrent requests share inference batches."""
+        settings = settings or RerankSettings()
+        known, owners, pairs = self._unscored(groups, score_cache)
+        scored: Sequence[Tuple[float, int, int]] = []
+        if pairs:
+            scored = await self.model_manager.batched(
+                ("reranker", model_name, settings),
+                pairs,
+                lambda batch: self._predict(model_name, batch, settings),
             )
-            for doc, score in zip(documents, scores)
+        return self._assemble(groups, known, owners, self._account(scored), top_k, score_cache)
+
+    def _unscored(
+        self,
+        groups: Sequence[Tuple[str, List[dict]]],
+        score_cache: Optional[RerankerScoreCache],
+    ) -> Tuple[List[Dict[int, float]], List[Tuple[int, int]], List[Tuple[str, str]]]:
+        """Cached scores per group, and the pairs left to score with their (group, corpus id)."""
+        known: List[Dict[int, float]] = [
+            score_cache.lookup(query, [doc["corpus_id"] for doc in documents])
+            if score_cache is not None
+            else {}
+            for query, documents in groups
         ]
-        scored.sort(key=lambda item: item.score, reverse=True)
-        return scored[:top_k]
+        owners: List[Tuple[int, int]] = []
+        pairs: List[Tuple[str, str]] = []
+        for group_idx, (query, documents) in enumerate(groups):
+            for doc in documents:
+                if doc["corpus_id"] not in known[group_idx]:
+                    owners.append((group_idx, doc["corpus_id"]))
+                    pairs.append((query, doc["text"]))
+        return known, owners, pairs
+
+    def _assemble(
+        self,
+        groups: Sequence[Tuple[str, List[dict]]],
+        known: List[Dict[int, float]],
+        owners: List[Tuple[int, int]],
+        scores: Sequence[float],
+        top_k: int,
+        score_cache: Optional[RerankerScoreCache],
+    ) -> List[List[RerankResult]]:
+        computed: List[Dict[int, float]] = [{} for _ in groups]
+        for (group_idx, corpus_id), score in zip(owners, scores):
+            computed[group_idx][corpus_id] = float(score)
+        for group_idx, (query, _) in enumerate(groups):
+            if score_cache is not None and computed[group_idx]:
+                score_cache.store(query, computed[group_idx])
+            known[group_idx].update(computed[group_idx])
+
+        results = []
+        for (_, documents), scores_by_id in zip(groups, known):
+            scored = [
+                RerankResult(
+                    corpus_id=doc["corpus_id"],
+                    doc_id=doc["doc_id"],
+                    section_id=doc["section_id"],
+                    score=float(scores_by_id[doc["corpus_id"]]),
+                )
+                for doc in documents
+            ]
+            scored.sort(key=lambda item: item.score, reverse=True)
+            results.append(scored[:top_k])
+        return results
+
+    @property
+    def padding_ratio(self) -> Optional[float]:
+        if not self.padded_tokens:
+            return None
+        return round(1 - self.real_tokens / self.padded_tokens, 4)
+
+    def _account(self, scored: Sequence[Tuple[float, int, int]]) -> List[float]:
+        for _, real, padded in scored:
+            self.real_tokens += real
+            self.padded_tokens += padded
+        return [score for score, _, _ in scored]
+
+    def _predict(
+        self, model_name: str, pairs: List[Tuple[str, str]], settings: RerankSettings
+    ) -> List[Tuple[float, int, int]]:
+        """Score pairs; each result is (score, tokens, padded tokens) for that pair.
+
+        Token counts travel with the scores so that callers sharing a
+        micro-batch each account for their own pairs.
+        """
+        loaded = self.model_manager.load_reranker_model(model_name, max_length=settings.max_length)
+        lengths = self.pair_token_lengths(loaded, pairs)
+        plan = BatchPlan.by_length(lengths, settings.max_batch_tokens, settings.max_batch_size)
+        scored: List[Tuple[float, int, int]] = [(0.0, 0, 0)] * len(pairs)
+        for indices in plan.batches:
+            scores = loaded.model.predict(
+                [pairs[idx] for idx in indices], batch_size=len(indices), show_progress_bar=False
+            )
+            longest = max(lengths[idx] for idx in indices)
+            for idx, score in zip(indices, scores):
+                scored[idx] = (float(score), lengths[idx], longest)
+        return scored
+
+    def pair_token_lengths(self, loaded: LoadedModel, pairs: List[Tuple[str, str]]) -> List[int]:
+        tokenizer = getattr(loaded.model, "tokenizer", None)
+        max_length = getattr(loaded.model, "max_length", None) or 512
+        if tokenizer is None:
+            return [
+                min(len(query.split()) + len(text.split()) + 3, max_length) for query, text in pairs
+            ]
+        encoded = tokenizer(
+            [query for query, _ in pairs],
+            [text for _, text in pairs],
+            truncation=True,
+            max_length=max_length,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.core.model_manager import ModelManager
 from sqlalchemy import select
 
 from backend.models import database as models
+from backend.services.corpus_service import CorpusService
+from backend.services.dimensionality import reduce_queries
 from backend.services.embedding_service import EmbeddingService
-from backend.services.reranker_service import RerankerService
-from backend.services.retrieval_service import RetrievalService
+from backend.services.reranker_score_cache import RerankerScoreCache
+from backend.services.reranker_service import RerankerService, RerankSettings
+from backend.services.vector_backend import get_vector_backend
 
 
 class RetrievalPipeline:
@@ -18,8 +22,10 @@ class RetrievalPipeline:
         self.db = db
         self.model_manager = model_manager
         self.embedding_service = EmbeddingService(model_manager)
-        self.retrieval_service = RetrievalService(db)
         self.reranker_service = RerankerService(model_manager)
+        self.corpus_service = CorpusService(db)
+        # Reranker score cache counters, summed over every call on this pipeline.
+        self.rerank_cache_stats = {"memory_hits": 0, "db_hits": 0, "computed": 0}
 
     async def retrieve(
         self,
@@ -29,38 +35,122 @@ class RetrievalPipeline:
         use_reranker: bool = False,
         reranker_model_name: str | None = None,
         reranker_top_k: int = 5,
+        ef_search: int | None = None,
+        with_payload: bool = False,
     ) -> dict:
+        results = await self.retrieve_batch(
+            model_id=model_id,
+            query_texts=[query_text],
+            retrieval_top_k=retrieval_top_k,
+            use_reranker=use_reranker,
+            reranker_model_name=reranker_model_name,
+            reranker_top_k=reranker_top_k,
+            ef_search=ef_search,
+            with_payload=with_payload,
+        )
+        return results[0]
+
+    async def retrieve_batch(
+        self,
+        model_id: int,
+        query_texts: List[str],
+        retrieval_top_k: int,
+        use_reranker: bool = False,
+        reranker_model_name: str | None = None,
+        reranker_top_k: int = 5,
+        ef_search: int | None = None,
+        with_payload: bool = False,
+        query_embeddings: Optional[np.ndarray] = None,
+        reranker_config: Optional[dict] = None,
+    ) -> List[dict]:
         embedding_model = await self._get_embedding_model(model_id)
-        embedding = self.embedding_service.embed_texts(
-            embedding_model.model_name, [query_text]
-        ).embeddings[0]
+        embeddings = query_embeddings
+        if embeddings is None:
+            embeddings = await self.embedding_service.encode_queries(
+                embedding_model.model_name,
+                list(query_texts),
+                normalize=embedding_model.config.get("normalize", True),
+            )
+            embeddings = reduce_queries(embedding_model, embeddings)
 
-        retrieved = await self.retrieval_service.similarity_search(
-            embedding_model.table_name, embedding, retrieval_top_k
+        backend = get_vector_backend(self.db, embedding_model)
+        retrieved_lists = await backend.batch_search(
+            embeddings, retrieval_top_k, ef_search=ef_search, with_payload=with_payload
         )
+        if with_payload:
+            await self._attach_previews(
+                retrieved_lists, int(embedding_model.config.get("preview_chars", 300))
+            )
 
         if not use_reranker or not reranker_model_name:
-            return {
-                "retrieved": retrieved,
-                "reranked": None,
-            }
+            return [
+                {"retrieved": retrieved, "reranked": None, "documents": {}}
+                for retrieved in retrieved_lists
+            ]
 
-        documents = await self._fetch_documents(retrieved)
-        reranked = self.reranker_service.rerank(
-            reranker_model_name, query_text, documents, top_k=reranker_top_k
+        # One corpus read for every candidate in the batch; callers reuse
+        # ``documents`` when they assemble contexts.
+        sections = await self.corpus_service.fetch_sections(
+            item["corpus_id"] for retrieved in retrieved_lists for item in retrieved
         )
-        return {
-            "retrieved": retrieved,
-            "reranked": [
+        rerank_settings = RerankSettings.from_config(reranker_config)
+        score_cache = RerankerScoreCache(self.db, rerank_settings.model_key(reranker_model_name))
+        await score_cache.load(
+            (query_text, item["corpus_id"])
+            for query_text, retrieved in zip(query_texts, retrieved_lists)
+            for item in retrieved
+        )
+        documents_lists = [
+            self.corpus_service.in_order(retrieved, sections) for retrieved in retrieved_lists
+        ]
+        reranked_lists = await self.reranker_service.rerank_batch_async(
+            reranker_model_name,
+            list(zip(query_texts, documents_lists)),
+            top_k=reranker_top_k,
+            score_cache=score_cache,
+            settings=rerank_settings,
+        )
+        results: List[dict] = []
+        for retrieved, documents, reranked in zip(retrieved_lists, documents_lists, reranked_lists):
+            results.append(
                 {
-                    "corpus_id": item.corpus_id,
-                    "doc_id": item.doc_id,
-                    "section_id": item.section_id,
-                    "score": item.score,
+                    "retrieved": retrieved,
+                    "reranked": [
+                        {
+                            "corpus_id": item.corpus_id,
+                            "doc_id": item.doc_id,
+                            "section_id": item.section_id,
+                            "score": item.score,
+                        }
+                        for item in reranked
+                    ],
+                    "documents": {doc["corpus_id"]: doc for doc in documents},
                 }
-                for item in reranked
-            ],
-        }
+            )
+        await score_cache.flush()
+        for key in self.rerank_cache_stats:
+            self.rerank_cache_stats[key] += getattr(score_cache, key)
+        return results
+
+    def rerank_cache_summary(self) -> dict:
+        stats = dict(self.rerank_cache_stats)
+        lookups = sum(stats.values())
+        hits = stats["memory_hits"] + stats["db_hits"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        return stats
+
+    async def _attach_previews(self, retrieved_lists: List[List[dict]], preview_chars: int) -> None:
+        # Backends without a payload (local indexes) get previews from the corpus store.
+        missing = [
+            item for retrieved in retrieved_lists for item in retrieved if "text_preview" not in item
+        ]
+        if not missing:
+            return
+        sections = await self.corpus_service.fetch_sections(item["corpus_id"] for item in missing)
+        for item in missing:
+            section_text = sections.get(item["corpus_id"], {}).get("text", "")
+            item["text_preview"] = section_text[:preview_chars]
+            item["section_length"] = len(section_text)
 
     async def _get_embedding_model(self, model_id: int) -> models.EmbeddingModel:
         result = await self.db.execute(
@@ -70,25 +160,3 @@ class RetrievalPipeline:
         if model is None:
             raise ValueError("Embedding model not found")
         return model
-
-    async def _fetch_documents(self, retrieved: List[dict]) -> List[dict]:
-        docs: List[dict] = []
-        for item in retrieved:
-            result = await self.db.execute(
-                select(models.Corpus).where(
-                    models.Corpus.doc_id == item["doc_id"],
-                    models.Corpus.section_id == item["section_id"],
-                )
-            )
-            row = result.scalar_one_or_none()
-            if row is None:
-                continue
-            docs.append(
-                {
-                    "corpus_id": row.id,
-                    "doc_id": row.doc_id,
-                    "section_id": row.section_id,
-                    "text": row.section_text,
-                }
-            )
-        return docs
@@ -1,40 +1,229 @@
 from __future__ import annotations
 
-from typing import List
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+# pgvector's default hnsw.ef_search; HNSW scans never return more rows than this.
+DEFAULT_EF_SEARCH = 40
+MAX_EF_SEARCH = 1000
+
+# Payload modes: read the preview columns stored in the vector table, or
+# join the top-k hits back to corpus by primary key.
+PAYLOAD_COLUMN = "column"
+PAYLOAD_JOIN = "join"
+
+# Column layouts for vector tables: full float32 vectors, half-precision
+# vectors, or float32 vectors searched through a binary-quantized index and
+# rescored exactly.
+STORAGE_VECTOR = "vector"
+STORAGE_HALFVEC = "halfvec"
+STORAGE_BINARY = "binary"
+VECTOR_STORAGES = (STORAGE_VECTOR, STORAGE_HALFVEC, STORAGE_BINARY)
+DEFAULT_RESCORE_FACTOR = 4
+
 
 class RetrievalService:
     def __init__(self, db: AsyncSession) -> None:
         self.db = db
 
     async def similarity_search(
-        self, table_name: str, query_embedding: List[float], top_k: int
+        self,
+        table_name: str,
+        query_embedding: Sequence[float],
+        top_k: int,
+        ef_search: Optional[int] = None,
+        payload: Optional[str] = None,
+        preview_chars: int = 300,
+        storage: str = STORAGE_VECTOR,
+        dimension: Optional[int] = None,
+        rescore_factor: int = DEFAULT_RESCORE_FACTOR,
     ) -> List[dict]:
         embedding_str = self._format_embedding(query_embedding)
+        candidates = self._rescore_candidates(storage, top_k, rescore_factor)
+        await self._set_ef_search(self.resolve_ef_search(candidates or top_k, ef_search))
+        inner_columns, outer_columns, outer_join = self._payload_sql(payload)
+        top_k_sql = self._top_k_sql(
+            table_name, ":embedding", storage, dimension, inner_columns, candidates
+        )
+        result = await self.db.execute(
+            text(
+                f"SELECT hits.*{outer_columns} FROM ({top_k_sql}) AS hits{outer_join} "
+                "ORDER BY hits.score DESC"
+            ),
+            self._params(
+                payload,
+                preview_chars,
+                embedding=embedding_str,
+                limit=top_k,
+                candidates=candidates,
+            ),
+        )
+        return self._rows_to_dicts(result.fetchall())
+
+    async def batch_similarity_search(
+        self,
+        table_name: str,
+        query_matrix: Sequence[Sequence[float]],
+        top_k: int,
+        ef_search: Optional[int] = None,
+        batch_size: int = 64,
+        payload: Optional[str] = None,
+        preview_chars: int = 300,
+        storage: str = STORAGE_VECTOR,
+        dimension: Optional[int] = None,
+        rescore_factor: int = DEFAULT_RESCORE_FACTOR,
+    ) -> List[List[dict]]:
+        """Top-k search for many query vectors, ``batch_size`` queries per statement.
+
+        Each statement unnests the query vectors and runs the index-ordered
+        top-k as a LATERAL subquery per vector, so the HNSW index is still
+        used and a sample of queries costs a handful of round-trips.
+        """
+        candidates = self._rescore_candidates(storage, top_k, rescore_factor)
+        await self._set_ef_search(self.resolve_ef_search(candidates or top_k, ef_search))
+        inner_columns, outer_columns, outer_join = self._payload_sql(payload)
+        top_k_sql = self._top_k_sql(
+            table_name, "q.embedding", storage, dimension, inner_columns, candidates
+        )
+        results: List[List[dict]] = []
+        for start in range(0, len(query_matrix), batch_size):
+            batch = query_matrix[start : start + batch_size]
+            result = await self.db.execute(
+                text(
+                    f"SELECT q.ord, hits.*{outer_columns} "
+                    "FROM unnest(CAST(:embeddings AS text[])) WITH ORDINALITY AS q(embedding, ord) "
+                    f"CROSS JOIN LATERAL ({top_k_sql}) AS hits{outer_join} "
+                    "ORDER BY q.ord, hits.score DESC"
+                ),
+                self._params(
+                    payload,
+                    preview_chars,
+                    embeddings=[self._format_embedding(query) for query in batch],
+                    limit=top_k,
+                    candidates=candidates,
+                ),
+            )
+            grouped: Dict[int, list] = defaultdict(list)
+            for row in result.fetchall():
+                grouped[row.ord].append(row)
+            results.extend(self._rows_to_dicts(grouped[ord_]) for ord_ in range(1, len(batch) + 1))
+        return results
+
+    async def exact_search(
+        self,
+        table_name: str,
+        query_embedding: Sequence[float],
+        top_k: int,
+        storage: str = STORAGE_VECTOR,
+    ) -> List[dict]:
+        """Brute-force cosine search, used as ground truth for ANN recall."""
+        embedding_str = self._format_embedding(query_embedding)
+        query = self._query_vector(":embedding", storage)
+        # Ordering by the score expression rather than the bare distance
+        # operator keeps the planner off the HNSW index.
         result = await self.db.execute(
             text(
                 "SELECT corpus_id, doc_id, section_id, "
-                "1 - (embedding <=> :embedding) AS score "
+                f"1 - (embedding <=> {query}) AS score "
                 f"FROM {table_name} "
-                "ORDER BY embedding <=> :embedding "
+                "ORDER BY score DESC "
                 "LIMIT :limit"
             ),
             {"embedding": embedding_str, "limit": top_k},
         )
-        rows = result.fetchall()
-        return [
-            {
+        return self._rows_to_dicts(result.fetchall())
+
+    def _top_k_sql(
+        self,
+        table_name: str,
+        query_param: str,
+        storage: str,
+        dimension: Optional[int],
+        inner_columns: str,
+        candidates: Optional[int],
+    ) -> str:
+        query = self._query_vector(query_param, storage)
+        select_columns = (
+            f"SELECT t.corpus_id, t.doc_id, t.section_id, "
+            f"1 - (t.embedding <=> {query}) AS score{inner_columns} "
+        )
+        if storage != STORAGE_BINARY:
+            return (
+                f"{select_columns}FROM {table_name} t "
+                f"ORDER BY t.embedding <=> {query} LIMIT :limit"
+            )
+        # Hamming-distance first pass over the bit index, then exact cosine
+        # rescoring of the candidates against the stored float vectors.
+        bits = f"bit({int(dimension)})"
+        return (
+            f"{select_columns}FROM ("
+            f"SELECT * FROM {table_name} "
+            f"ORDER BY binary_quantize(embedding)::{bits} <~> binary_quantize({query})::{bits} "
+            "LIMIT :candidates"
+            f") t ORDER BY t.embedding <=> {query} LIMIT :limit"
+        )
+
+    def _query_vector(self, query_param: str, storage: str) -> str:
+        vector_type = "halfvec" if storage == STORAGE_HALFVEC else "vector"
+        return f"CAST({query_param} AS {vector_type})"
+
+    def _rescore_candidates(
+        self, storage: str, top_k: int, rescore_factor: int
+    ) -> Optional[int]:
+        if storage != STORAGE_BINARY:
+            return None
+        return top_k * max(1, rescore_factor)
+
+    def resolve_ef_search(self, top_k: int, ef_search: Optional[int]) -> int:
+        if ef_search is None:
+            ef_search = max(top_k, DEFAULT_EF_SEARCH)
+        return max(1, min(int(ef_search), MAX_EF_SEARCH))
+
+    async def _set_ef_search(self, ef_search: int) -> None:
+        # SET LOCAL lasts until the end of the surrounding transaction, so it
+        # is issued for every search; otherwise a search without ef_search
+        # would inherit whatever an earlier search in the transaction set.
+        await self.db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+
+    def _payload_sql(self, payload: Optional[str]) -> Tuple[str, str, str]:
+        """Return (inner columns, outer columns, outer join) for a payload mode."""
+        if payload == PAYLOAD_COLUMN:
+            return ", t.text_preview, t.section_length", "", ""
+        if payload == PAYLOAD_JOIN:
+            return (
+                "",
+                ", left(c.section_text, :preview_chars) AS text_preview, "
+                "length(c.section_text) AS section_length",
+                " JOIN corpus c ON c.id = hits.corpus_id",
+            )
+        return "", "", ""
+
+    def _params(self, payload: Optional[str], preview_chars: int, **params: object) -> dict:
+        if payload == PAYLOAD_JOIN:
+            params["preview_chars"] = preview_chars
+        if params.get("candidates") is None:
+            params.pop("candidates", None)
+        return params
+
+    def _rows_to_dicts(self, rows: Sequence) -> List[dict]:
+        items = []
+        for row in rows:
+            item = {
                 "corpus_id": row.corpus_id,
                 "doc_id": row.doc_id,
                 "section_id": row.section_id,
                 "score": float(row.score),
             }
-            for row in rows
-        ]
+            mapping = row._mapping
+            if "text_preview" in mapping:
+                item["text_preview"] = mapping["text_preview"] or ""
+                item["section_length"] = mapping["section_length"]
+            items.append(item)
+        return items
 
-    def _format_embedding(self, embedding: List[float]) -> str:
+    def _format_embedding(self, embedding: Sequence[float]) -> str:
         values = ",".join(str(value) for value in embedding)
         return f"[{values}]"
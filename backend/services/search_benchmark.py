@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.inference_executor import inference_executor
+from backend.core.model_manager import ModelManager
+from backend.models import database as models
+from backend.services.dimensionality import reduce_queries
+from backend.services.embedding_service import EmbeddingService
+from backend.services.vector_backend import PgVectorBackend, get_vector_backend
+
+
+class SearchBenchmarkService:
+    """Replays sampled queries against a vector table to compare search settings."""
+
+    def __init__(self, db: AsyncSession, model_manager: ModelManager) -> None:
+        self.db = db
+        self.embedding_service = EmbeddingService(model_manager)
+
+    async def sweep_ef_search(
+        self,
+        model: models.EmbeddingModel,
+        ef_search_values: List[int],
+        sample_size: int,
+        top_k: int,
+        sample_seed: Optional[int] = None,
+        api_key: Optional[str] = None,
+    ) -> dict:
+        query_texts = await self._sample_query_texts(sample_size, sample_seed)
+        embeddings = await self._encode_queries(model, query_texts, api_key)
+        backend = PgVectorBackend(self.db, model)
+
+        exact_latencies: List[float] = []
+        ground_truth: List[set] = []
+        for embedding in embeddings:
+            started = time.perf_counter()
+            exact = await backend.exact_search(embedding, top_k)
+            exact_latencies.append((time.perf_counter() - started) * 1000)
+            ground_truth.append({item["corpus_id"] for item in exact})
+
+        points = []
+        for ef_search in sorted(set(ef_search_values)):
+            latencies: List[float] = []
+            recalls: List[float] = []
+            for embedding, truth in zip(embeddings, ground_truth):
+                started = time.perf_counter()
+                results = await backend.search(embedding, top_k, ef_search=ef_search)
+                latencies.append((time.perf_counter() - started) * 1000)
+                found = {item["corpus_id"] for item in results}
+                recalls.append(len(found & truth) / len(truth) if truth else 1.0)
+            points.append(
+                {
+                    "ef_search": ef_search,
+                    "recall_at_k": float(np.mean(recalls)) if recalls else 0.0,
+                    **self._latency_summary(latencies),
+                }
+            )
+
+        return {
+            "model_id": model.id,
+            "top_k": top_k,
+            "sample_size": len(query_texts),
+            "vector_storage": backend.vector_storage,
+            "exact": self._latency_summary(exact_latencies),
+            "points": points,
+        }
+
+    async def compare_backends(
+        self,
+        model: models.EmbeddingModel,
+        backend_names: List[str],
+        sample_size: int,
+        top_k: int,
+        sample_seed: Optional[int] = None,
+        api_key: Optional[str] = None,
+    ) -> dict:
+        query_texts = await self._sample_query_texts(sample_size, sample_seed)
+        embeddings = await self._encode_queries(model, query_texts, api_key)
+        exact = await get_vector_backend(self.db, model, "exact").batch_search(embeddings, top_k)
+        ground_truth = [{item["corpus_id"] for item in results} for results in exact]
+
+        reports = []
+        for name in backend_names:
+            backend = get_vector_backend(self.db, model, name)
+            if len(embeddings):
+                # Warm-up search so lazy index loads are not counted as latency.
+                await backend.search(embeddings[0], top_k)
+            latencies: List[float] = []
+            recalls: List[float] = []
+            for embedding, truth in zip(embeddings, ground_truth):
+                started = time.perf_counter()
+                results = await backend.search(embedding, top_k)
+                latencies.append((time.perf_counter() - started) * 1000)
+                found = {item["corpus_id"] for item in results}
+                recalls.append(len(found & truth) / len(truth) if truth else 1.0)
+            reports.append(
+                {
+                    "backend": name,
+                    "recall_at_k": float(np.mean(recalls)) if recalls else 0.0,
+                    **self._latency_summary(latencies),
+                    "stats": await backend.stats(),
+                }
+            )
+
+        return {
+            "model_id": model.id,
+            "top_k": top_k,
+            "sample_size": len(query_texts),
+            "backends": reports,
+        }
+
+    async def _encode_queries(
+        self, model: models.EmbeddingModel, query_texts: List[str], api_key: Optional[str]
+    ) -> np.ndarray:
+        if model.model_source == "openai":
+            if not api_key:
+                raise ValueError("OpenAI API key required")
+            result = await self.embedding_service.embed_texts_openai_async(
+                model.model_name, query_texts, api_key
+            )
+            return reduce_queries(model, result.embeddings)
+        embeddings = await inference_executor.run(
+            self.embedding_service.encode_batch,
+            model.model_name,
+            query_texts,
+            normalize=model.config.get("normalize", True),
+        )
+        return reduce_queries(model, embeddings)
+
+    async def _sample_query_texts(self, sample_size: int, sample_seed: Optional[int]) -> List[str]:
+        result = await self.db.execute(select(models.Query.query_text).order_by(models.Query.id))
+        texts = list(result.scalars().all())
+        if sample_size >= len(texts):
+            return texts
+        return random.Random(sample_seed).sample(texts, sample_size)
+
+    def _latency_summary(self, latencies: List[float]) -> dict:
+        if not latencies:
+            return {"p50_ms": 0.0, "p95_ms": 0.0, "mean_ms": 0.0}
+        return {
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "mean_ms": round(float(np.mean(latencies)), 3),
+        }
@@ -0,0 +1,482 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import settings
+from backend.models import database as models
+from backend.services.dimensionality import stored_dimension
+from backend.services.exact_search import ExactVectorIndex, normalize_rows
+from backend.services.ivf_index import IVFVectorIndex
+from backend.services.retrieval_service import (
+    DEFAULT_RESCORE_FACTOR,
+    PAYLOAD_COLUMN,
+    PAYLOAD_JOIN,
+    STORAGE_VECTOR,
+    RetrievalService,
+)
+from backend.services.vector_storage import (
+    BulkInsertStats,
+    IndexBuildStats,
+    IndexParams,
+    VectorRow,
+    VectorStorage,
+)
+
+SEARCH_BACKENDS = ("pgvector", "exact", "ivf")
+
+
+class VectorBackend(ABC):
+    """Storage and nearest-neighbour search for one embedding model's vectors."""
+
+    name: str = ""
+
+    def __init__(self, db: AsyncSession, model: models.EmbeddingModel) -> None:
+        self.db = db
+        self.model = model
+        self.config: Dict[str, Any] = model.config or {}
+
+    @abstractmethod
+    async def create(self) -> None:
+        ...
+
+    @abstractmethod
+    async def bulk_add(self, rows: Sequence[VectorRow]) -> BulkInsertStats:
+        ...
+
+    @abstractmethod
+    async def finalize(self) -> IndexBuildStats:
+        """Build the search structure once all rows have been added."""
+
+    @abstractmethod
+    async def search(self, query: Sequence[float], top_k: int, **options: Any) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def batch_search(
+        self, queries: np.ndarray, top_k: int, **options: Any
+    ) -> List[List[dict]]:
+        ...
+
+    @abstractmethod
+    async def stats(self) -> dict:
+        ...
+
+
+class PgVectorBackend(VectorBackend):
+    name = "pgvector"
+
+    def __init__(self, db: AsyncSession, model: models.EmbeddingModel) -> None:
+        super().__init__(db, model)
+        self.storage = VectorStorage(db)
+        self.retrieval_service = RetrievalService(db)
+
+    @property
+    def stores_payload(self) -> bool:
+        return bool(self.config.get("store_payload", False))
+
+    @property
+    def vector_storage(self) -> str:
+        return self.config.get("vector_storage", STORAGE_VECTOR)
+
+    async def create(self) -> None:
+        self.model.table_name = await self.storage.create_vector_table(
+            self.model.id,
+            stored_dimension(self.model),
+            store_payload=self.stores_payload,
+            storage=self.vector_storage,
+        )
+
+    async def bulk_add(self, rows: Sequence[VectorRow]) -> BulkInsertStats:
+        if not self.config.get("bulk_load", True):
+            started = time.perf_counter()
+            inserted = await self.storage.insert_vectors(
+                self.model.table_name, rows, with_payload=self.stores_payload
+            )
+            return BulkInsertStats(inserted, time.perf_counter() - started, "insert")
+        return await self.storage.bulk_insert_vectors(
+            self.model.table_name,
+            rows,
+            chunk_size=int(self.config.get("copy_chunk_size", 5000)),
+            with_payload=self.stores_payload,
+            storage=self.vector_storage,
+        )
+
+    async def finalize(self) -> IndexBuildStats:
+        return await self.storage.build_vector_index(
+            self.model.table_name,
+            IndexParams.from_config(self.config),
+            storage=self.vector_storage,
+            dimension=stored_dimension(self.model),
+        )
+
+    async def search(
+        self,
+        query: Sequence[float],
+        top_k: int,
+        ef_search: Optional[int] = None,
+        with_payload: bool = False,
+        **options: Any,
+    ) -> List[dict]:
+        payload = self._payload_mode(with_payload)
+        async with self._recording_round_trips(payload, 1):
+            return await self.retrieval_service.similarity_search(
+                self.model.table_name,
+                query,
+                top_k,
+                ef_search=self._ef_search(ef_search),
+                payload=payload,
+                preview_chars=self.preview_chars,
+                **self._storage_options(),
+            )
+
+    async def batch_search(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        ef_search: Optional[int] = None,
+        with_payload: bool = False,
+        **options: Any,
+    ) -> List[List[dict]]:
+        payload = self._payload_mode(with_payload)
+        async with self._recording_round_trips(payload, len(queries)):
+            return await self.retrieval_service.batch_similarity_search(
+                self.model.table_name,
+                queries,
+                top_k,
+                ef_search=self._ef_search(ef_search),
+                payload=payload,
+                preview_chars=self.preview_chars,
+                **self._storage_options(),
+            )
+
+    async def exact_search(self, query: Sequence[float], top_k: int) -> List[dict]:
+        return await self.retrieval_service.exact_search(
+            self.model.table_name, query, top_k, storage=self.vector_storage
+        )
+
+    def _ef_search(self, ef_search: Optional[int]) -> Optional[int]:
+        """The requested ef_search, else the model's configured one."""
+        if ef_search is not None:
+            return ef_search
+        configured = self.config.get("ef_search")
+        return int(configured) if configured else None
+
+    @property
+    def preview_chars(self) -> int:
+        return int(self.config.get("preview_chars", 300))
+
+    def _storage_options(self) -> Dict[str, Any]:
+        return {
+            "storage": self.vector_storage,
+            "dimension": stored_dimension(self.model),
+            "rescore_factor": int(self.config.get("rescore_factor", DEFAULT_RESCORE_FACTOR)),
+        }
+
+    def _payload_mode(self, with_payload: bool) -> Optional[str]:
+        if not with_payload:
+            return None
+        return PAYLOAD_COLUMN if self.stores_payload else PAYLOAD_JOIN
+
+    async def stats(self) -> dict:
+        table_name = self.model.table_name
+        result = await self.db.execute(
+            text(
+                "SELECT pg_total_relation_size(CAST(:table_name AS regclass)) AS table_bytes, "
+                "COALESCE(pg_relation_size(to_regclass(:index_name)), 0) AS index_bytes"
+            ),
+            {"table_name": table_name, "index_name": self.storage.index_name(table_name)},
+        )
+        sizes = result.one()
+        stats = {
+            "backend": self.name,
+            "vector_storage": self.vector_storage,
+            "rows": await self.storage.count_vectors(table_name),
+            "table_bytes": int(sizes.table_bytes),
+            "index_bytes": int(sizes.index_bytes),
+        }
+        if self.stores_payload:
+            payload_result = await self.db.execute(
+                text(
+                    "SELECT COALESCE(sum(pg_column_size(text_preview)), 0) "
+                    "+ COALESCE(sum(pg_column_size(section_length)), 0) "
+                    f"FROM {table_name}"
+                )
+            )
+            stats["payload_bytes"] = int(payload_result.scalar_one())
+        stats["round_trips_per_search"] = {
+            mode: round(statements / searches, 2)
+            for mode, (searches, statements) in _round_trips.get(table_name, {}).items()
+        }
+        return stats
+
+    @asynccontextmanager
+    async def _recording_round_trips(self, payload: Optional[str], searches: int):
+        """Count the statements issued inside the block against ``payload``'s mode.
+
+        ``stats`` reports the mean per search from what searches in this
+        process actually cost, instead of running searches of its own.
+        """
+        connection = (await self.db.connection()).sync_connection
+        statements = 0
+
+        def count(*args: Any) -> None:
+            nonlocal statements
+            statements += 1
+
+        event.listen(connection, "before_cursor_execute", count)
+        try:
+            yield
+        finally:
+            event.remove(connection, "before_cursor_execute", count)
+        totals = _round_trips.setdefault(self.model.table_name, {}).get(payload or "none", (0, 0))
+        _round_trips[self.model.table_name][payload or "none"] = (
+            totals[0] + searches,
+            totals[1] + statements,
+        )
+
+
+# (searches, statements) per vector table and payload mode, for ``stats``.
+_round_trips: Dict[str, Dict[str, Tuple[int, int]]] = {}
+
+# Loaded indexes by directory, with the build stamp they were loaded from.
+_loaded_indexes: Dict[Path, Tuple[str, ExactVectorIndex]] = {}
+_build_locks: Dict[Path, asyncio.Lock] = {}
+
+BUILD_COMPLETE = "build_complete"
+
+
+class LocalIndexBackend(VectorBackend):
+    """Index files on local disk, built from the model's pgvector table.
+
+    The pgvector table stays the source of truth. ``build`` replays it
+    through ``bulk_add`` into a fresh versioned directory, then atomically
+    repoints the ``directory`` symlink at it, so readers in other processes
+    always find either the old or the new complete index. Loaded indexes
+    are memory-mapped and cached per process until the link moves.
+    """
+
+    def __init__(self, db: AsyncSession, model: models.EmbeddingModel) -> None:
+        super().__init__(db, model)
+        self.storage = VectorStorage(db)
+        self.directory = Path(settings.vector_data_dir) / model.table_name / self.name
+        self.staging: Optional[Path] = None
+        self._corpus_ids: List[int] = []
+        self._section_ids: List[int] = []
+        self._doc_ids: List[str] = []
+
+    async def create(self) -> None:
+        # Each build writes its own versioned directory, so builds in other
+        # processes cannot delete or append to it.
+        self.staging = self.directory.with_name(f"{self.name}.build-{uuid.uuid4().hex}")
+        self.staging.mkdir(parents=True)
+        self._corpus_ids, self._section_ids, self._doc_ids = [], [], []
+
+    async def bulk_add(self, rows: Sequence[VectorRow]) -> BulkInsertStats:
+        started = time.perf_counter()
+        if rows:
+            await asyncio.get_running_loop().run_in_executor(None, self._append_rows, rows)
+            self._corpus_ids.extend(row.corpus_id for row in rows)
+            self._section_ids.extend(row.section_id for row in rows)
+            self._doc_ids.extend(row.doc_id for row in rows)
+        return BulkInsertStats(len(rows), time.perf_counter() - started, "append")
+
+    async def finalize(self) -> IndexBuildStats:
+        started = time.perf_counter()
+        size_bytes = await asyncio.get_running_loop().run_in_executor(None, self._finish_build)
+        return IndexBuildStats(seconds=time.perf_counter() - started, size_bytes=size_bytes)
+
+    async def build(self, page_size: int = 10000) -> IndexBuildStats:
+        async with self._build_lock():
+            return await self._build(page_size)
+
+    async def _build(self, page_size: int) -> IndexBuildStats:
+        await self.create()
+        try:
+            storage = self.config.get("vector_storage", STORAGE_VECTOR)
+            async for page in self.storage.iter_vector_pages(
+                self.model.table_name, page_size, storage=storage
+            ):
+                await self.bulk_add(page)
+            return await self.finalize()
+        finally:
+            # Set once the build is published; left over only after a failure.
+            if self.staging is not None:
+                shutil.rmtree(self.staging, ignore_errors=True)
+                self.staging = None
+
+    async def search(self, query: Sequence[float], top_k: int, **options: Any) -> List[dict]:
+        index = await self.index()
+        return index.search(query, top_k, **self._search_options(options))
+
+    async def batch_search(
+        self, queries: np.ndarray, top_k: int, **options: Any
+    ) -> List[List[dict]]:
+        index = await self.index()
+        return index.batch_search(queries, top_k, **self._search_options(options))
+
+    async def index(self) -> ExactVectorIndex:
+        current = self._current_build()
+        loaded = _loaded_indexes.get(self.directory)
+        if loaded is not None and current is not None and loaded[0] == current.name:
+            return loaded[1]
+        if current is None:
+            async with self._build_lock():
+                # Another request may have finished the build while this one waited.
+                if self._current_build() is None:
+                    await self._build(10000)
+            current = self._current_build()
+        try:
+            index = self._load(current)
+        except FileNotFoundError:
+            # A newer build replaced this one and removed it while it loaded.
+            current = self._current_build()
+            index = self._load(current)
+        _loaded_indexes[self.directory] = (current.name, index)
+        return index
+
+    async def stats(self) -> dict:
+        current = self._current_build()
+        built = current is not None
+        return {
+            "backend": self.name,
+            "built": built,
+            "rows": len(await self.index()) if built else 0,
+            "disk_bytes": sum(p.stat().st_size for p in current.iterdir()) if built else 0,
+        }
+
+    def _build_lock(self) -> asyncio.Lock:
+        return _build_locks.setdefault(self.directory, asyncio.Lock())
+
+    def _current_build(self) -> Optional[Path]:
+        """Versioned directory the live index link points at, or None if unbuilt."""
+        try:
+            target = self.directory.with_name(os.readlink(self.directory))
+        except OSError:
+            return None
+        return target if (target / BUILD_COMPLETE).exists() else None
+
+    def _append_rows(self, rows: Sequence[VectorRow]) -> None:
+        matrix = normalize_rows(np.stack([row.embedding for row in rows]).astype(np.float32))
+        with open(self.staging / "embeddings.f32", "ab") as handle:
+            handle.write(matrix.tobytes())
+
+    def _finish_build(self) -> int:
+        self._write_arrays()
+        self._build_index(self.staging)
+        (self.staging / BUILD_COMPLETE).touch()
+        size_bytes = sum(path.stat().st_size for path in self.staging.iterdir())
+        previous = self._current_build()
+        # os.replace swaps the link in one step; readers resolve it either
+        # to the old build or to this one, never to nothing.
+        link = self.directory.with_name(f"{self.name}.link-{uuid.uuid4().hex}")
+        link.symlink_to(self.staging.name)
+        if self.directory.is_dir() and not self.directory.is_symlink():
+            # Indexes built before versioned directories were a plain directory.
+            shutil.rmtree(self.directory, ignore_errors=True)
+        os.replace(link, self.directory)
+        self.staging = None
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+        return size_bytes
+
+    def _write_arrays(self) -> None:
+        raw_path = self.staging / "embeddings.f32"
+        total = len(self._corpus_ids)
+        shape = (total, stored_dimension(self.model))
+        if total == 0:
+            # An empty file cannot be memory-mapped; an empty table still
+            # gets a valid (0, dimension) index.
+            np.save(self.staging / "embeddings.npy", np.zeros(shape, dtype=np.float32))
+        else:
+            raw = np.memmap(raw_path, dtype=np.float32, mode="r", shape=shape)
+            embeddings = np.lib.format.open_memmap(
+                self.staging / "embeddings.npy", mode="w+", dtype=np.float32, shape=shape
+            )
+            for start in range(0, total, 65536):
+                embeddings[start : start + 65536] = raw[start : start + 65536]
+            embeddings.flush()
+            del embeddings, raw
+        raw_path.unlink(missing_ok=True)
+        np.save(self.staging / "corpus_ids.npy", np.asarray(self._corpus_ids, dtype=np.int64))
+        np.save(self.staging / "section_ids.npy", np.asarray(self._section_ids, dtype=np.int32))
+        np.save(self.staging / "doc_ids.npy", np.asarray(self._doc_ids, dtype=str))
+
+    def _build_index(self, directory: Path) -> None:
+        pass
+
+    def _search_options(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        return {}
+
+    @abstractmethod
+    def _load(self, directory: Path) -> ExactVectorIndex:
+        ...
+
+
+class ExactBackend(LocalIndexBackend):
+    name = "exact"
+
+    def _load(self, directory: Path) -> ExactVectorIndex:
+        return ExactVectorIndex(directory)
+
+
+class IVFBackend(LocalIndexBackend):
+    name = "ivf"
+
+    def _build_index(self, directory: Path) -> None:
+        nlist = self.config.get("ivf_lists")
+        IVFVectorIndex.build(directory, nlist=int(nlist) if nlist else None)
+
+    def _load(self, directory: Path) -> ExactVectorIndex:
+        return IVFVectorIndex(directory, nprobe=int(self.config.get("ivf_nprobe", 8)))
+
+    def _search_options(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        return {"nprobe": options.get("nprobe")}
+
+    async def stats(self) -> dict:
+        stats = await super().stats()
+        if stats["built"]:
+            index = await self.index()
+            stats.update({"nlist": index.nlist, "nprobe": index.nprobe})
+        return stats
+
+
+_BACKENDS = {
+    PgVectorBackend.name: PgVectorBackend,
+    ExactBackend.name: ExactBackend,
+    IVFBackend.name: IVFBackend,
+}
+
+
+async def remove_local_indexes(model: models.EmbeddingModel) -> None:
+    """Delete every local index built for ``model`` and forget its cached copies."""
+    if not model.table_name:
+        return
+    root = Path(settings.vector_data_dir) / model.table_name
+    for directory in [path for path in _loaded_indexes if path.parent == root]:
+        del _loaded_indexes[directory]
+    for directory in [path for path in _build_locks if path.parent == root]:
+        del _build_locks[directory]
+    await asyncio.get_running_loop().run_in_executor(
+        None, lambda: shutil.rmtree(root, ignore_errors=True)
+    )
+
+
+def get_vector_backend(
+    db: AsyncSession, model: models.EmbeddingModel, name: Optional[str] = None
+) -> VectorBackend:
+    backend_name = name or (model.config or {}).get("search_backend", "pgvector")
+    if backend_name not in _BACKENDS:
+        raise ValueError(f"Unknown search backend: {backend_name}")
+    return _BACKENDS[backend_name](db, model)
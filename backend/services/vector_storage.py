@@ -1,18 +1,112 @@
 from __future__ import annotations
 
+import re
+import struct
+import time
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Iterable, List
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence
 
+import numpy as np
 from sqlalchemy import Column, Integer, MetaData, String, Table, Text, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.services.ivf_index import IVF_SAMPLE_SIZE
+from backend.services.retrieval_service import (
+    STORAGE_BINARY,
+    STORAGE_HALFVEC,
+    STORAGE_VECTOR,
+    VECTOR_STORAGES,
+)
+
 
 @dataclass
 class VectorRow:
     corpus_id: int
     doc_id: str
     section_id: int
-    embedding: List[float]
+    embedding: np.ndarray
+    text_preview: Optional[str] = None
+    section_length: Optional[int] = None
+
+
+@dataclass
+class BulkInsertStats:
+    rows: int
+    seconds: float
+    method: str
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class IndexParams:
+    m: int = 16
+    ef_construction: int = 64
+    maintenance_work_mem: Optional[str] = None
+    parallel_workers: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "IndexParams":
+        maintenance_work_mem = config.get("maintenance_work_mem")
+        if maintenance_work_mem is not None and not re.fullmatch(
+            r"\d+\s*(kB|MB|GB)", str(maintenance_work_mem)
+        ):
+            raise ValueError("maintenance_work_mem must look like '512MB' or '2GB'")
+        ivf_lists = config.get("ivf_lists")
+        if ivf_lists is not None and not 0 < int(ivf_lists) <= IVF_SAMPLE_SIZE:
+            raise ValueError(
+                f"ivf_lists must be between 1 and {IVF_SAMPLE_SIZE}, the k-means sample size"
+            )
+        parallel_workers = config.get("parallel_workers")
+        return cls(
+            m=int(config.get("hnsw_m", cls.m)),
+            ef_construction=int(config.get("hnsw_ef_construction", cls.ef_construction)),
+            maintenance_work_mem=str(maintenance_work_mem) if maintenance_work_mem else None,
+            parallel_workers=int(parallel_workers) if parallel_workers is not None else None,
+        )
+
+
+@dataclass
+class IndexBuildStats:
+    seconds: float
+    size_bytes: int
+
+
+def _encode_vector_binary(value: Any) -> bytes:
+    # pgvector binary wire format: uint16 dim, uint16 unused, big-endian float32 values.
+    array = np.asarray(value, dtype=">f4")
+    return struct.pack(">HH", array.shape[0], 0) + array.tobytes()
+
+
+def _decode_vector_binary(data: bytes) -> np.ndarray:
+    dim, _ = struct.unpack_from(">HH", data)
+    return np.frombuffer(data, dtype=">f4", count=dim, offset=4).astype(np.float32)
+
+
+def _encode_halfvec_binary(value: Any) -> bytes:
+    # Same layout as vector, with big-endian float16 values.
+    array = np.asarray(value, dtype=">f2")
+    return struct.pack(">HH", array.shape[0], 0) + array.tobytes()
+
+
+def _decode_halfvec_binary(data: bytes) -> np.ndarray:
+    dim, _ = struct.unpack_from(">HH", data)
+    return np.frombuffer(data, dtype=">f2", count=dim, offset=4).astype(np.float32)
+
+
+_BINARY_CODECS = {
+    "vector": (_encode_vector_binary, _decode_vector_binary),
+    "halfvec": (_encode_halfvec_binary, _decode_halfvec_binary),
+}
+
+
+def column_type(storage: str) -> str:
+    """SQL type of the embedding column for a ``vector_storage`` setting."""
+    return "halfvec" if storage == STORAGE_HALFVEC else "vector"
 
 
 class VectorStorage:
@@ -20,42 +114,233 @@ class VectorStorage:
         self.db = db
         self.metadata = MetaData()
 
-    async def create_vector_table(self, model_id: int, dimension: int) -> str:
+    async def create_vector_table(
+        self,
+        model_id: int,
+        dimension: int,
+        store_payload: bool = False,
+        storage: str = STORAGE_VECTOR,
+    ) -> str:
+        if storage not in VECTOR_STORAGES:
+            raise ValueError(f"Unknown vector storage: {storage}")
         table_name = f"vectors_{model_id}"
+        payload_columns = "text_preview TEXT,\nsection_length INTEGER,\n" if store_payload else ""
         await self.db.execute(text(f"CREATE TABLE IF NOT EXISTS {table_name} (\n" +
                                    "id SERIAL PRIMARY KEY,\n" +
                                    "corpus_id INTEGER NOT NULL REFERENCES corpus(id),\n" +
                                    "doc_id VARCHAR(255) NOT NULL,\n" +
                                    "section_id INTEGER NOT NULL,\n" +
-                                   f"embedding vector({dimension}),\n" +
+                                   f"embedding {column_type(storage)}({dimension}),\n" +
+                                   payload_columns +
                                    "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,\n" +
                                    "UNIQUE(corpus_id)\n" +
                                    ")"))
+        return table_name
+
+    async def create_query_vector_table(self, model_id: int, dimension: int) -> str:
+        table_name = self.query_table_name(model_id)
         await self.db.execute(text(
-            f"CREATE INDEX IF NOT EXISTS idx_{table_name}_embedding "
-            f"ON {table_name} USING hnsw (embedding vector_cosine_ops) "
-            "WITH (m = 16, ef_construction = 64)"
+            f"CREATE TABLE IF NOT EXISTS {table_name} ("
+            "query_uuid VARCHAR(255) PRIMARY KEY, "
+            f"embedding vector({dimension}))"
         ))
+        await self.db.execute(text(f"TRUNCATE {table_name}"))
         return table_name
 
-    async def insert_vectors(self, table_name: str, rows: Iterable[VectorRow]) -> int:
-        inserted = 0
-        for row in rows:
+    def query_table_name(self, model_id: int) -> str:
+        return f"query_vectors_{model_id}"
+
+    async def bulk_insert_query_vectors(
+        self, table_name: str, query_uuids: Sequence[str], embeddings: np.ndarray
+    ) -> int:
+        async with self._binary_vectors() as driver:
+            await driver.copy_records_to_table(
+                table_name,
+                records=list(zip(query_uuids, embeddings)),
+                columns=["query_uuid", "embedding"],
+            )
+        return len(query_uuids)
+
+    async def fetch_query_vectors(
+        self, table_name: str, query_uuids: Sequence[str]
+    ) -> Dict[str, np.ndarray]:
+        """Stored query embeddings by uuid; empty if the table was never built."""
+        exists = await self.db.execute(
+            text("SELECT to_regclass(:table_name) IS NOT NULL"), {"table_name": table_name}
+        )
+        if not exists.scalar_one():
+            return {}
+        async with self._binary_vectors() as driver:
+            records = await driver.fetch(
+                f"SELECT query_uuid, embedding FROM {table_name} WHERE query_uuid = ANY($1)",
+                list(query_uuids),
+            )
+        return {record["query_uuid"]: record["embedding"] for record in records}
+
+    async def build_vector_index(
+        self,
+        table_name: str,
+        params: IndexParams,
+        storage: str = STORAGE_VECTOR,
+        dimension: Optional[int] = None,
+    ) -> IndexBuildStats:
+        """Build the HNSW index once the table is loaded.
+
+        Building over existing rows is much cheaper than maintaining the
+        graph through every insert, so callers run this after the bulk load.
+        Binary storage indexes the bit-quantized expression instead of the
+        float column.
+        """
+        index_name = self.index_name(table_name)
+        if params.maintenance_work_mem:
+            await self.db.execute(
+                text(f"SET LOCAL maintenance_work_mem = '{params.maintenance_work_mem}'")
+            )
+        if params.parallel_workers is not None:
             await self.db.execute(
-                text(
-                    f"INSERT INTO {table_name} (corpus_id, doc_id, section_id, embedding) "
-                    "VALUES (:corpus_id, :doc_id, :section_id, :embedding)"
-                ),
-                {
-                    "corpus_id": row.corpus_id,
-                    "doc_id": row.doc_id,
-                    "section_id": row.section_id,
-                    "embedding": self._format_embedding(row.embedding),
-                },
+                text(f"SET LOCAL max_parallel_maintenance_workers = {params.parallel_workers}")
             )
+        started = time.perf_counter()
+        if storage == STORAGE_BINARY:
+            indexed = f"(binary_quantize(embedding)::bit({int(dimension)})) bit_hamming_ops"
+        else:
+            indexed = f"embedding {column_type(storage)}_cosine_ops"
+        await self.db.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {index_name} "
+            f"ON {table_name} USING hnsw ({indexed}) "
+            f"WITH (m = {params.m}, ef_construction = {params.ef_construction})"
+        ))
+        seconds = time.perf_counter() - started
+        size_result = await self.db.execute(
+            text("SELECT pg_relation_size(CAST(:index_name AS regclass))"),
+            {"index_name": index_name},
+        )
+        return IndexBuildStats(seconds=seconds, size_bytes=int(size_result.scalar_one() or 0))
+
+    def index_name(self, table_name: str) -> str:
+        return f"idx_{table_name}_embedding"
+
+    async def insert_vectors(
+        self, table_name: str, rows: Iterable[VectorRow], with_payload: bool = False
+    ) -> int:
+        columns = self._copy_columns(with_payload)
+        statement = text(
+            f"INSERT INTO {table_name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + column for column in columns)})"
+        )
+        inserted = 0
+        for row in rows:
+            values = {
+                "corpus_id": row.corpus_id,
+                "doc_id": row.doc_id,
+                "section_id": row.section_id,
+                "embedding": self._format_embedding(row.embedding),
+                "text_preview": row.text_preview,
+                "section_length": row.section_length,
+            }
+            await self.db.execute(statement, {column: values[column] for column in columns})
             inserted += 1
         return inserted
 
-    def _format_embedding(self, embedding: List[float]) -> str:
+    async def bulk_insert_vectors(
+        self,
+        table_name: str,
+        rows: Iterable[VectorRow],
+        chunk_size: int = 5000,
+        with_payload: bool = False,
+        storage: str = STORAGE_VECTOR,
+    ) -> BulkInsertStats:
+        """Load rows with binary COPY, falling back to per-row INSERTs.
+
+        The COPY runs on the session's own connection, so it shares the
+        caller's transaction.
+        """
+        started = time.perf_counter()
+        driver = await self._driver_connection()
+        if not hasattr(driver, "copy_records_to_table"):
+            inserted = await self.insert_vectors(table_name, rows, with_payload)
+            return BulkInsertStats(inserted, time.perf_counter() - started, "insert")
+
+        inserted = 0
+        async with self._binary_vectors(column_type(storage)) as driver:
+            iterator = iter(rows)
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if not chunk:
+                    break
+                await driver.copy_records_to_table(
+                    table_name,
+                    records=[self._copy_record(row, with_payload) for row in chunk],
+                    columns=self._copy_columns(with_payload),
+                )
+                inserted += len(chunk)
+        return BulkInsertStats(inserted, time.perf_counter() - started, "copy")
+
+    async def count_vectors(self, table_name: str) -> int:
+        result = await self.db.execute(text(f"SELECT count(*) FROM {table_name}"))
+        return int(result.scalar_one() or 0)
+
+    async def iter_vector_pages(
+        self, table_name: str, page_size: int = 10000, storage: str = STORAGE_VECTOR
+    ) -> AsyncIterator[List[VectorRow]]:
+        """Read a vector table back in id order, decoding embeddings as float32."""
+        last_id = 0
+        while True:
+            async with self._binary_vectors(column_type(storage)) as driver:
+                records = await driver.fetch(
+                    "SELECT id, corpus_id, doc_id, section_id, embedding "
+                    f"FROM {table_name} WHERE id > $1 ORDER BY id LIMIT $2",
+                    last_id,
+                    page_size,
+                )
+            if not records:
+                return
+            yield [
+                VectorRow(
+                    corpus_id=record["corpus_id"],
+                    doc_id=record["doc_id"],
+                    section_id=record["section_id"],
+                    embedding=record["embedding"],
+                )
+                for record in records
+            ]
+            last_id = records[-1]["id"]
+
+    @asynccontextmanager
+    async def _binary_vectors(self, type_name: str = "vector") -> AsyncIterator[Any]:
+        driver = await self._driver_connection()
+        encoder, decoder = _BINARY_CODECS[type_name]
+        await driver.set_type_codec(
+            type_name,
+            schema="public",
+            encoder=encoder,
+            decoder=decoder,
+            format="binary",
+        )
+        try:
+            yield driver
+        finally:
+            # The connection goes back to the pool; other queries bind
+            # vectors as text literals.
+            await driver.reset_type_codec(type_name, schema="public")
+
+    def _copy_columns(self, with_payload: bool = False) -> List[str]:
+        columns = ["corpus_id", "doc_id", "section_id", "embedding"]
+        if with_payload:
+            columns += ["text_preview", "section_length"]
+        return columns
+
+    def _copy_record(self, row: VectorRow, with_payload: bool) -> tuple:
+        record = (row.corpus_id, row.doc_id, row.section_id, row.embedding)
+        if with_payload:
+            record += (row.text_preview, row.section_length)
+        return record
+
+    async def _driver_connection(self) -> Any:
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        return raw.driver_connection
+
+    def _format_embedding(self, embedding: Sequence[float]) -> str:
         values = ",".join(str(value) for value in embedding)
         return f"[{values}]"
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+
+from backend.config import settings
+from backend.core.database import SessionLocal, engine
+from backend.core.model_manager import ModelManager
+from backend.core.progress import progress_store
+from backend.core.schema import create_schema
+from backend.models import database as models
+from backend.models.schemas import EmbeddingModelCreate, EvaluationRunCreate
+from backend.services.dataset_ingestion import DatasetIngestionService
+from backend.services.embedding_job import EmbeddingJobService
+from backend.services.evaluation_service import EvaluationService
+from backend.services.job_queue import JobQueue
+
+
+async def _run_embedding(db, job: models.Job) -> Optional[dict]:
+    request = EmbeddingModelCreate(**job.payload["request"])
+    model_id = job.payload["model_id"]
+    # A job picked up again after its worker died continues from the
+    # checkpoint instead of starting over.
+    resume = bool(job.payload.get("resume")) or job.attempts > 1
+    service = EmbeddingJobService(db, ModelManager())
+    try:
+        inserted = await service.run(request, model_id, resume)
+    except asyncio.CancelledError:
+        if await _still_held(db, job):
+            await _set_model_status(db, model_id, "cancelled")
+        raise
+    except Exception as exc:
+        await service.mark_failed(model_id, exc)
+        raise
+    return {"model_id": model_id, "total_vectors": inserted}
+
+
+async def _run_ingestion(db, job: models.Job) -> Optional[dict]:
+    service = DatasetIngestionService(db)
+    try:
+        return await service.ingest(job.payload["subset"])
+    except Exception as exc:
+        await service.mark_failed(exc)
+        raise
+
+
+async def _run_evaluation(db, job: models.Job) -> Optional[dict]:
+    config = EvaluationRunCreate(**job.payload["config"])
+    run_id = job.payload["run_id"]
+    try:
+        await EvaluationService(db).run_evaluation_async(config, run_id)
+    except asyncio.CancelledError:
+        if not await _still_held(db, job):
+            raise
+        result = await db.execute(
+            select(models.EvaluationRun).where(models.EvaluationRun.id == run_id)
+        )
+        run = result.scalar_one()
+        run.status = "cancelled"
+        await db.commit()
+        raise
+    result = await db.execute(
+        select(models.EvaluationRun.status, models.EvaluationRun.error_message).where(
+            models.EvaluationRun.id == run_id
+        )
+    )
+    row = result.one()
+    if row.status == "error":
+        raise RuntimeError(row.error_message or "Evaluation failed")
+    return {"run_id": run_id, "status": row.status}
+
+
+async def _still_held(db, job: models.Job) -> bool:
+    """False once another worker has reclaimed the job; it now owns the job's records."""
+    await db.rollback()
+    return await JobQueue(db).is_held_by(job.id, job.worker_id)
+
+
+async def _set_model_status(db, model_id: int, status: str) -> None:
+    await db.rollback()
+    result = await db.execute(
+        select(models.EmbeddingModel).where(models.EmbeddingModel.id == model_id)
+    )
+    model = result.scalar_one()
+    model.status = status
+    await db.commit()
+
+
+HANDLERS: Dict[str, Callable[[Any, models.Job], Awaitable[Optional[dict]]]] = {
+    "embedding": _run_embedding,
+    "ingestion": _run_ingestion,
+    "evaluation": _run_evaluation,
+}
+
+
+class JobWorker:
+    """Claims jobs from the ``jobs`` table and runs them one at a time.
+
+    Every job gets its own database session. While it runs, a heartbeat
+    task refreshes ``heartbeat_at``, publishes the job's progress and
+    cancels the job when ``cancel_requested`` is set or when the job has been
+    reclaimed by another worker after this one's heartbeat went stale.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, job_types: Optional[List[str]] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.job_types = job_types
+        self._stopping = False
+        self._cancel_requested = False
+        self._lost = False
+
+    async def run_forever(self) -> None:
+        while not self._stopping:
+            if not await self.run_once():
+                await asyncio.sleep(settings.job_poll_seconds)
+
+    def stop(self) -> None:
+        self._stopping = True
+
+    async def run_once(self) -> bool:
+        async with SessionLocal() as db:
+            job = await JobQueue(db).claim(self.worker_id, self.job_types)
+        if job is None:
+            return False
+
+        self._cancel_requested = False
+        self._lost = False
+        task = asyncio.create_task(self._execute(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job, task))
+        status, result, error = "completed", None, None
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if self._lost:
+                # Another worker reclaimed the job and is running it now.
+                return True
+            if not self._cancel_requested:
+                # The worker itself is shutting down; leave the job for
+                # another worker to reclaim once its heartbeat goes stale.
+                raise
+            status = "cancelled"
+        except Exception as exc:
+            status, error = "error", str(exc)
+        finally:
+            heartbeat.cancel()
+
+        async with SessionLocal() as db:
+            await JobQueue(db).finish(
+                job.id,
+                self.worker_id,
+                status,
+                result=result,
+                error_message=error,
+                progress=self._progress(job),
+            )
+        return True
+
+    async def _execute(self, job: models.Job) -> Optional[dict]:
+        async with SessionLocal() as db:
+            return await HANDLERS[job.job_type](db, job)
+
+    async def _heartbeat(self, job: models.Job, task: asyncio.Task) -> None:
+        while not task.done():
+            await asyncio.sleep(settings.job_heartbeat_seconds)
+            async with SessionLocal() as db:
+                cancel_requested = await JobQueue(db).heartbeat(
+                    job.id, self.worker_id, self._progress(job)
+                )
+            if cancel_requested is None:
+                self._lost = True
+                task.cancel()
+                return
+            if cancel_requested:
+                self._cancel_requested = True
+                task.cancel()
+                return
+
+    def _progress(self, job: models.Job) -> Optional[dict]:
+        progress = progress_store.get(job.job_type)
+        return dict(progress) if progress else None
+
+
+async def main(job_types: Optional[List[str]] = None) -> None:
+    async with engine.begin() as conn:
+        await create_schema(conn)
+    await JobWorker(job_types=job_types).run_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background jobs from the jobs table.")
+    parser.add_argument(
+        "--job-types", nargs="*", default=None, help="Only claim these job types"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.job_types))
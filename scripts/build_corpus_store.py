@@ -0,0 +1,14 @@
+import asyncio
+
+from backend.core.database import SessionLocal
+from backend.services.corpus_store import build_corpus_store
+
+
+async def main() -> None:
+    async with SessionLocal() as session:
+        directory = await build_corpus_store(session)
+        print(f"Corpus store written to {directory}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,11 +1,12 @@
 import asyncio
 
-from backend.core.database import Base, engine
+from backend.core.database import engine
+from backend.core.schema import create_schema
 
 
 async def main() -> None:
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await create_schema(conn)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+import pytest_asyncio
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    """Session factory bound to a throwaway Postgres database.
+
+    Tests that need one are skipped unless ``TEST_DATABASE_URL`` points at a
+    database they may create tables in and delete rows from.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from backend.core.schema import create_schema
+
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await create_schema(conn)
+    try:
+        yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    finally:
+        await engine.dispose()
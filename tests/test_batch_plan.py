@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+
+from backend.services.embedding_service import BatchPlan  # noqa: E402
+
+
+def test_contiguous_covers_every_index_in_order():
+    plan = BatchPlan.contiguous(7, 3)
+    assert plan.batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert BatchPlan.contiguous(0, 3).batches == []
+
+
+def test_by_length_groups_similar_lengths_under_the_token_budget():
+    lengths = [10, 200, 12, 190, 11, 205]
+    plan = BatchPlan.by_length(lengths, max_tokens=400)
+
+    assert sorted(idx for batch in plan.batches for idx in batch) == list(range(len(lengths)))
+    for batch in plan.batches:
+        assert len(batch) * max(lengths[idx] for idx in batch) <= 400
+    # Longest first; the short texts share a batch instead of padding to 205.
+    assert plan.batches == [[5], [1, 3], [2, 4, 0]]
+
+
+def test_by_length_respects_max_batch_size():
+    plan = BatchPlan.by_length([5] * 10, max_tokens=10_000, max_batch_size=4)
+    assert [len(batch) for batch in plan.batches] == [4, 4, 2]
+
+
+def test_text_longer_than_the_budget_gets_its_own_batch():
+    plan = BatchPlan.by_length([1000, 10, 10], max_tokens=100)
+    assert plan.batches[0] == [0]
+    assert sorted(plan.batches[1]) == [1, 2]
+
+
+def test_padding_accounting():
+    plan = BatchPlan.by_length([8, 4, 4, 2], max_tokens=16, max_batch_size=2)
+    assert plan.batches == [[0, 1], [2, 3]]
+    assert plan.real_tokens == 18
+    assert plan.padded_tokens == 2 * 8 + 2 * 4
+    assert plan.padding_ratio == pytest.approx(1 - 18 / 24)
+    assert BatchPlan([]).padding_ratio == 0.0
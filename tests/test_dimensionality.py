@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services.dimensionality import stored_dimension, validate_reduction
+
+
+def _model(config):
+    return SimpleNamespace(dimension=768, config=config)
+
+
+def test_stored_dimension_follows_the_reduction():
+    assert stored_dimension(_model({})) == 768
+    assert stored_dimension(_model({"reduction": "truncate", "reduced_dimension": 256})) == 256
+    # Without a reduction the vectors are written at full width.
+    assert stored_dimension(_model({"reduced_dimension": 256})) == 768
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"reduced_dimension": 256},
+        {"reduction": "svd", "reduced_dimension": 256},
+        {"reduction": "pca"},
+        {"reduction": "truncate", "reduced_dimension": 1024},
+        {"reduction": "pca", "reduced_dimension": 256, "pca_sample_size": 100},
+    ],
+)
+def test_invalid_reductions_are_rejected(config):
+    with pytest.raises(ValueError):
+        validate_reduction(config, 768)
+
+
+def test_valid_reductions_pass():
+    validate_reduction({}, 768)
+    validate_reduction({"reduction": "pca", "reduced_dimension": 128}, 768)
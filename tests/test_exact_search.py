@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from backend.config import settings
+from backend.services.exact_search import ExactVectorIndex, normalize_rows
+from backend.services.vector_backend import ExactBackend
+from backend.services.vector_storage import VectorRow
+
+DIMENSION = 8
+
+
+def _rows(embeddings: np.ndarray, first_id: int = 1):
+    return [
+        VectorRow(
+            corpus_id=first_id + idx,
+            doc_id=f"doc-{(first_id + idx) // 3}",
+            section_id=(first_id + idx) % 3,
+            embedding=vector,
+        )
+        for idx, vector in enumerate(embeddings)
+    ]
+
+
+def _save_index(directory, embeddings: np.ndarray) -> None:
+    np.save(directory / "embeddings.npy", normalize_rows(embeddings).astype(np.float32))
+    np.save(directory / "corpus_ids.npy", np.arange(1, len(embeddings) + 1, dtype=np.int64))
+    np.save(directory / "section_ids.npy", np.zeros(len(embeddings), dtype=np.int32))
+    np.save(directory / "doc_ids.npy", np.asarray([f"d{i}" for i in range(len(embeddings))]))
+
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_data_dir", str(tmp_path))
+    return SimpleNamespace(
+        id=1, table_name="vectors_1", dimension=DIMENSION, config={"search_backend": "exact"}
+    )
+
+
+def test_blocked_scan_matches_brute_force(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(500, DIMENSION)).astype(np.float32)
+    queries = rng.normal(size=(7, DIMENSION)).astype(np.float32)
+    _save_index(tmp_path, embeddings)
+
+    index = ExactVectorIndex(tmp_path, block_rows=64)
+    results = index.batch_search(queries, top_k=10)
+
+    expected = np.argsort(-(normalize_rows(queries) @ normalize_rows(embeddings).T), axis=1)[:, :10]
+    for hits, rows in zip(results, expected):
+        assert [hit["corpus_id"] for hit in hits] == list(rows + 1)
+        scores = [hit["score"] for hit in hits]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_top_k_larger_than_index(tmp_path):
+    _save_index(tmp_path, np.eye(3, DIMENSION, dtype=np.float32))
+    hits = ExactVectorIndex(tmp_path).search(np.eye(1, DIMENSION)[0], top_k=10)
+    assert [hit["corpus_id"] for hit in hits][0] == 1
+    assert len(hits) == 3
+
+
+@pytest.mark.asyncio
+async def test_backend_builds_and_searches(model):
+    rng = np.random.default_rng(1)
+    embeddings = rng.normal(size=(40, DIMENSION)).astype(np.float32)
+    backend = ExactBackend(None, model)
+    await backend.create()
+    await backend.bulk_add(_rows(embeddings[:25]))
+    await backend.bulk_add(_rows(embeddings[25:], first_id=26))
+    stats = await backend.finalize()
+
+    assert stats.size_bytes > 0
+    hits = await backend.search(embeddings[30], top_k=3)
+    assert hits[0]["corpus_id"] == 31
+    assert hits[0]["doc_id"] == "doc-10"
+    assert hits[0]["section_id"] == 1
+    assert hits[0]["score"] == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_backend_handles_an_empty_table(model):
+    backend = ExactBackend(None, model)
+    await backend.create()
+    await backend.finalize()
+
+    assert len(await backend.index()) == 0
+    assert await backend.batch_search(np.ones((2, DIMENSION), np.float32), top_k=5) == [[], []]
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from backend.config import settings
+from backend.services.exact_search import normalize_rows
+from backend.services.ivf_index import IVF_SAMPLE_SIZE, IVFVectorIndex
+from backend.services.vector_backend import (
+    ExactBackend,
+    IVFBackend,
+    _loaded_indexes,
+    remove_local_indexes,
+)
+from backend.services.vector_storage import IndexParams, VectorRow
+
+DIMENSION = 16
+
+
+def _rows(embeddings: np.ndarray):
+    return [
+        VectorRow(corpus_id=idx + 1, doc_id=f"doc-{idx}", section_id=0, embedding=vector)
+        for idx, vector in enumerate(embeddings)
+    ]
+
+
+def _model(config):
+    return SimpleNamespace(id=1, table_name="vectors_1", dimension=DIMENSION, config=config)
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_data_dir", str(tmp_path))
+    return tmp_path
+
+
+def _pages(embeddings: np.ndarray, page_size: int = 50):
+    async def iter_vector_pages(table_name, size, storage=None):
+        rows = _rows(embeddings)
+        for start in range(0, len(rows), page_size):
+            await asyncio.sleep(0)
+            yield rows[start : start + page_size]
+
+    return iter_vector_pages
+
+
+def _save_rows(directory, embeddings: np.ndarray) -> None:
+    np.save(directory / "embeddings.npy", normalize_rows(embeddings).astype(np.float32))
+    np.save(directory / "corpus_ids.npy", np.arange(1, len(embeddings) + 1, dtype=np.int64))
+    np.save(directory / "section_ids.npy", np.zeros(len(embeddings), dtype=np.int32))
+    np.save(directory / "doc_ids.npy", np.asarray([f"doc-{i}" for i in range(len(embeddings))]))
+
+
+def test_probing_every_list_is_exact(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(300, DIMENSION)).astype(np.float32)
+    queries = rng.normal(size=(5, DIMENSION)).astype(np.float32)
+    _save_rows(tmp_path, embeddings)
+    IVFVectorIndex.build(tmp_path, nlist=12, sample_size=200)
+
+    index = IVFVectorIndex(tmp_path)
+    assert index.nlist == 12
+    assert index.offsets[-1] == 300
+    results = index.batch_search(queries, top_k=5, nprobe=index.nlist)
+
+    expected = np.argsort(-(normalize_rows(queries) @ normalize_rows(embeddings).T), axis=1)[:, :5]
+    for hits, rows in zip(results, expected):
+        assert [hit["corpus_id"] for hit in hits] == list(rows + 1)
+        assert [hit["doc_id"] for hit in hits] == [f"doc-{row}" for row in rows]
+
+
+def test_empty_index_returns_no_hits(tmp_path):
+    _save_rows(tmp_path, np.zeros((0, DIMENSION), np.float32))
+    IVFVectorIndex.build(tmp_path)
+    assert IVFVectorIndex(tmp_path).batch_search(np.ones((2, DIMENSION)), top_k=3) == [[], []]
+
+
+@pytest.mark.asyncio
+async def test_ivf_backend_builds_from_the_table():
+    rng = np.random.default_rng(1)
+    embeddings = rng.normal(size=(200, DIMENSION)).astype(np.float32)
+    backend = IVFBackend(None, _model({"ivf_lists": 8, "ivf_nprobe": 8}))
+    backend.storage.iter_vector_pages = _pages(embeddings)
+
+    await backend.build()
+    hits = await backend.search(embeddings[42], top_k=1)
+    assert hits[0]["corpus_id"] == 43
+    stats = await backend.stats()
+    assert stats["rows"] == 200 and stats["nlist"] == 8
+
+
+@pytest.mark.asyncio
+async def test_rebuild_replaces_a_cached_index():
+    rng = np.random.default_rng(2)
+    first = rng.normal(size=(30, DIMENSION)).astype(np.float32)
+    second = rng.normal(size=(60, DIMENSION)).astype(np.float32)
+
+    reader = ExactBackend(None, _model({}))
+    reader.storage.iter_vector_pages = _pages(first)
+    await reader.build()
+    assert len(await reader.index()) == 30
+
+    # A build from another backend instance (as in another process) is
+    # picked up by the reader's cached index on its next search.
+    writer = ExactBackend(None, _model({}))
+    writer.storage.iter_vector_pages = _pages(second)
+    await writer.build()
+    assert len(await reader.index()) == 60
+
+
+@pytest.mark.asyncio
+async def test_concurrent_builds_leave_one_complete_index(data_dir):
+    rng = np.random.default_rng(3)
+    embeddings = rng.normal(size=(120, DIMENSION)).astype(np.float32)
+    backends = [ExactBackend(None, _model({})) for _ in range(3)]
+    for backend in backends:
+        backend.storage.iter_vector_pages = _pages(embeddings, page_size=10)
+
+    await asyncio.gather(*(backend.build() for backend in backends))
+
+    live = data_dir / "vectors_1" / "exact"
+    assert live.is_symlink()
+    # Only the live build survives; superseded and staging directories are gone.
+    assert sorted(path.name for path in live.parent.iterdir()) == sorted(
+        ["exact", os.readlink(live)]
+    )
+    assert len(await backends[0].index()) == 120
+    hits = await backends[1].search(embeddings[7], top_k=1)
+    assert hits[0]["corpus_id"] == 8
+
+
+@pytest.mark.asyncio
+async def test_rebuild_swaps_the_link_and_removes_the_old_build(data_dir):
+    rng = np.random.default_rng(4)
+    embeddings = rng.normal(size=(40, DIMENSION)).astype(np.float32)
+    backend = ExactBackend(None, _model({}))
+    backend.storage.iter_vector_pages = _pages(embeddings)
+    await backend.build()
+    live = data_dir / "vectors_1" / "exact"
+    first = live.with_name(os.readlink(live))
+
+    await backend.build()
+    second = live.with_name(os.readlink(live))
+    assert second != first
+    assert not first.exists()
+    assert len(await backend.index()) == 40
+
+
+@pytest.mark.asyncio
+async def test_remove_local_indexes_deletes_files_and_cached_indexes(data_dir):
+    rng = np.random.default_rng(5)
+    embeddings = rng.normal(size=(20, DIMENSION)).astype(np.float32)
+    model = _model({"ivf_lists": 4})
+    for backend in (ExactBackend(None, model), IVFBackend(None, model)):
+        backend.storage.iter_vector_pages = _pages(embeddings)
+        await backend.build()
+        await backend.index()
+
+    await remove_local_indexes(model)
+
+    assert not (data_dir / "vectors_1").exists()
+    assert all(path.parent != data_dir / "vectors_1" for path in _loaded_indexes)
+    assert (await ExactBackend(None, model).stats())["built"] is False
+
+
+def test_ivf_lists_must_fit_the_kmeans_sample():
+    assert IndexParams.from_config({"ivf_lists": IVF_SAMPLE_SIZE})
+    for ivf_lists in (0, IVF_SAMPLE_SIZE + 1):
+        with pytest.raises(ValueError):
+            IndexParams.from_config({"ivf_lists": ivf_lists})
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, update
+
+from backend.config import settings
+from backend.models import database as models
+from backend.services.job_queue import JobQueue
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def queue_db(session_factory):
+    async with session_factory() as db:
+        await db.execute(delete(models.Job))
+        await db.commit()
+    yield session_factory
+
+
+async def _enqueue(session_factory, job_type: str = "embedding") -> int:
+    async with session_factory() as db:
+        job = await JobQueue(db).enqueue(job_type, {"model_id": 1, "request": {"api_key": "sk-1"}})
+        await db.commit()
+        return job.id
+
+
+async def _age_heartbeat(session_factory, job_id: int) -> None:
+    stale = datetime.utcnow() - timedelta(seconds=settings.job_stale_seconds + 1)
+    async with session_factory() as db:
+        await db.execute(update(models.Job).where(models.Job.id == job_id).values(heartbeat_at=stale))
+        await db.commit()
+
+
+async def test_claim_takes_each_queued_job_once(queue_db):
+    first = await _enqueue(queue_db)
+    second = await _enqueue(queue_db, "ingestion")
+    async with queue_db() as db_a, queue_db() as db_b:
+        job_a = await JobQueue(db_a).claim("worker-a")
+        job_b = await JobQueue(db_b).claim("worker-b")
+    assert {job_a.id, job_b.id} == {first, second}
+    assert job_a.status == job_b.status == "running"
+    assert job_a.attempts == 1
+    async with queue_db() as db:
+        assert await JobQueue(db).claim("worker-c") is None
+
+
+async def test_claim_filters_job_types(queue_db):
+    await _enqueue(queue_db, "embedding")
+    async with queue_db() as db:
+        assert await JobQueue(db).claim("worker-a", ["evaluation"]) is None
+        job = await JobQueue(db).claim("worker-a", ["embedding"])
+    assert job is not None and job.job_type == "embedding"
+
+
+async def test_stale_running_job_is_reclaimed(queue_db):
+    job_id = await _enqueue(queue_db)
+    async with queue_db() as db:
+        await JobQueue(db).claim("worker-a")
+    async with queue_db() as db:
+        assert await JobQueue(db).claim("worker-b") is None
+
+    await _age_heartbeat(queue_db, job_id)
+    async with queue_db() as db:
+        job = await JobQueue(db).claim("worker-b")
+    assert job.id == job_id
+    assert job.worker_id == "worker-b"
+    assert job.attempts == 2
+
+
+async def test_reclaimed_job_fences_out_the_old_worker(queue_db):
+    job_id = await _enqueue(queue_db)
+    async with queue_db() as db:
+        await JobQueue(db).claim("worker-a")
+    await _age_heartbeat(queue_db, job_id)
+    async with queue_db() as db:
+        await JobQueue(db).claim("worker-b")
+
+    async with queue_db() as db:
+        queue = JobQueue(db)
+        assert await queue.heartbeat(job_id, "worker-a", {"progress": 1}) is None
+        assert await queue.finish(job_id, "worker-a", "completed") is False
+        assert await queue.heartbeat(job_id, "worker-b", {"progress": 2}) is False
+        assert await queue.finish(job_id, "worker-b", "completed", result={"ok": True})
+
+    async with queue_db() as db:
+        job = await JobQueue(db).get(job_id)
+    assert job.status == "completed"
+    assert job.worker_id == "worker-b"
+    assert job.progress == {"progress": 2}
+    assert job.payload["request"]["api_key"] is None
+
+
+async def test_heartbeat_reports_cancel_request(queue_db):
+    job_id = await _enqueue(queue_db)
+    async with queue_db() as db:
+        await JobQueue(db).claim("worker-a")
+        await JobQueue(db).request_cancel(job_id)
+        assert await JobQueue(db).heartbeat(job_id, "worker-a") is True
+
+
+async def test_cancel_of_an_orphaned_job_finishes_it(queue_db):
+    job_id = await _enqueue(queue_db)
+    async with queue_db() as db:
+        await JobQueue(db).claim("worker-a")
+    await _age_heartbeat(queue_db, job_id)
+
+    async with queue_db() as db:
+        job = await JobQueue(db).request_cancel(job_id)
+    assert job.status == "cancelled"
+    assert job.completed_at is not None
+    async with queue_db() as db:
+        assert await JobQueue(db).active_embedding_job(1) is None
+
+
+async def test_claim_cancels_stale_jobs_with_a_pending_cancel(queue_db):
+    job_id = await _enqueue(queue_db)
+    async with queue_db() as db:
+        await JobQueue(db).claim("worker-a")
+        await JobQueue(db).request_cancel(job_id)
+    await _age_heartbeat(queue_db, job_id)
+
+    async with queue_db() as db:
+        assert await JobQueue(db).claim("worker-b") is None
+    async with queue_db() as db:
+        job = await JobQueue(db).get(job_id)
+    assert job.status == "cancelled"
+    assert job.completed_at is not None
+
+
+async def test_stale_running_job_is_not_active(queue_db):
+    job_id = await _enqueue(queue_db)
+    async with queue_db() as db:
+        await JobQueue(db).claim("worker-a")
+        assert (await JobQueue(db).active_embedding_job(1)).id == job_id
+    await _age_heartbeat(queue_db, job_id)
+    async with queue_db() as db:
+        assert await JobQueue(db).active_embedding_job(1) is None
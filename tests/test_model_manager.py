@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+
+from backend.core import model_manager as model_manager_module  # noqa: E402
+from backend.core.model_manager import ModelManager  # noqa: E402
+
+# float32 Linear(512, 512) is just over 1 MB of weights.
+MODULE_MB = (512 * 512 + 512) * 4 / (1024 * 1024)
+
+
+class _FakeCrossEncoder:
+    """Mirrors sentence-transformers' CrossEncoder: weights on ``.model``, no ``.parameters()``."""
+
+    def __init__(self, model_name, device=None, max_length=None):
+        self.model = torch.nn.Linear(512, 512)
+        self.max_length = max_length
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(ModelManager, "_instance", None)
+    monkeypatch.setattr(model_manager_module, "CrossEncoder", _FakeCrossEncoder)
+    monkeypatch.setattr(
+        model_manager_module,
+        "SentenceTransformer",
+        lambda model_name, device=None: torch.nn.Linear(512, 512),
+    )
+    manager = ModelManager()
+    manager.budget_mb = 2.5 * MODULE_MB
+    return manager
+
+
+def _loaded_names(manager):
+    return [model["name"] for model in manager.get_loaded_models()]
+
+
+def test_least_recently_used_model_is_evicted(manager):
+    manager.load_embedding_model("a")
+    manager.load_embedding_model("b")
+    manager.load_embedding_model("a")
+    manager.load_embedding_model("c")
+
+    assert _loaded_names(manager) == ["a", "c"]
+    assert manager.evictions == 1
+    assert manager.total_memory_mb() <= manager.budget_mb
+
+
+def test_pinned_models_are_not_evicted(manager):
+    with manager.pinned(ModelManager.embedding_key("a")):
+        manager.load_embedding_model("a")
+        manager.load_embedding_model("b")
+        manager.load_embedding_model("c")
+        assert "a" in _loaded_names(manager)
+    assert _loaded_names(manager) == ["a", "c"]
+
+
+def test_zero_budget_disables_eviction(manager):
+    manager.budget_mb = 0
+    for name in ("a", "b", "c", "d"):
+        manager.load_embedding_model(name)
+    assert len(_loaded_names(manager)) == 4
+    assert manager.evictions == 0
+
+
+def test_reranker_counts_against_the_budget(manager):
+    loaded = manager.load_reranker_model("reranker", max_length=256)
+    assert loaded.memory_mb == pytest.approx(MODULE_MB)
+
+    manager.load_embedding_model("a")
+    manager.load_embedding_model("b")
+    assert "reranker" not in _loaded_names(manager)
+    assert manager.evictions == 1
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import numpy as np
+import pytest
+
+from backend.services import openai_embeddings
+from backend.services.openai_embeddings import OpenAIEmbeddingClient
+
+pytestmark = pytest.mark.asyncio
+
+
+def _vector(text: str) -> list:
+    return [float(len(text)), float(ord(text[0]))]
+
+
+def _embeddings_response(request: httpx.Request) -> httpx.Response:
+    inputs = json.loads(request.content)["input"]
+    # The API does not promise response order; rows carry their input index.
+    data = [
+        {"object": "embedding", "index": idx, "embedding": _vector(text)}
+        for idx, text in reversed(list(enumerate(inputs)))
+    ]
+    return httpx.Response(200, json={"object": "list", "data": data})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(openai_embeddings.asyncio, "sleep", fake_sleep)
+    return delays
+
+
+def _client(handler, **options) -> OpenAIEmbeddingClient:
+    return OpenAIEmbeddingClient(
+        "sk-test",
+        base_url="https://api.test/v1",
+        transport=httpx.MockTransport(handler),
+        **options,
+    )
+
+
+async def test_rows_come_back_in_input_order(sleeps):
+    texts = ["alpha", "be", "gamma ray", "d", "epsilon", "zeta function", "eta"]
+    seen = []
+
+    def handler(request):
+        assert request.headers["authorization"] == "Bearer sk-test"
+        seen.append(json.loads(request.content)["input"])
+        return _embeddings_response(request)
+
+    async with _client(handler, max_inputs_per_request=2, max_concurrency=3) as client:
+        embeddings = await client.embed("text-embedding-3-small", texts)
+
+    assert len(seen) == 4
+    np.testing.assert_array_equal(embeddings, np.asarray([_vector(t) for t in texts], np.float32))
+    assert sleeps == []
+
+
+async def test_retries_honour_retry_after_then_back_off(sleeps):
+    failures = [
+        httpx.Response(429, headers={"retry-after-ms": "250"}),
+        httpx.Response(429, headers={"retry-after": "2"}),
+        httpx.Response(503),
+    ]
+
+    def handler(request):
+        if failures:
+            return failures.pop(0)
+        return _embeddings_response(request)
+
+    async with _client(handler) as client:
+        embeddings = await client.embed("text-embedding-3-small", ["one", "two"])
+
+    assert embeddings.shape == (2, 2)
+    assert client.requests_sent == 4
+    assert client.retries == 3
+    assert sleeps[:2] == [0.25, 2.0]
+    # No Retry-After on the 503: jittered exponential backoff (attempt 3 -> 2-4s).
+    assert 2.0 <= sleeps[2] <= 4.0
+
+
+async def test_client_errors_are_not_retried(sleeps):
+    def handler(request):
+        return httpx.Response(400, json={"error": {"message": "bad input"}})
+
+    async with _client(handler) as client:
+        with pytest.raises(ValueError, match="400"):
+            await client.embed("text-embedding-3-small", ["one"])
+    assert client.requests_sent == 1
+    assert sleeps == []
+
+
+async def test_gives_up_after_max_retries(sleeps):
+    def handler(request):
+        return httpx.Response(500)
+
+    async with _client(handler, max_retries=2) as client:
+        with pytest.raises(ValueError, match="500"):
+            await client.embed("text-embedding-3-small", ["one"])
+    assert client.requests_sent == 3
+    assert len(sleeps) == 2
+
+
+async def test_connections_are_reused_across_calls(sleeps):
+    async with _client(_embeddings_response) as client:
+        await client.embed("text-embedding-3-small", ["one"])
+        http_client = client._client
+        await client.embed("text-embedding-3-small", ["two"])
+        assert client._client is http_client
+    assert client._client is None
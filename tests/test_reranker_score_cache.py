@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql
+
+from backend.core.score_cache import reranker_score_cache
+from backend.models import database as models
+from backend.services import reranker_score_cache as score_cache_module
+from backend.services.reranker_score_cache import RerankerScoreCache
+
+pytestmark = pytest.mark.asyncio
+
+MODEL_KEY = "test-reranker@256"
+
+
+class _EmptyResult:
+    def all(self):
+        return []
+
+
+class _RecordingSession:
+    """Stands in for an AsyncSession that finds nothing and records each statement."""
+
+    def __init__(self):
+        self.bind_counts = []
+        self.commits = 0
+
+    async def execute(self, statement):
+        compiled = statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True}
+        )
+        self.bind_counts.append(len(compiled.params))
+        return _EmptyResult()
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture(autouse=True)
+def clear_process_cache():
+    reranker_score_cache.clear()
+    yield
+    reranker_score_cache.clear()
+
+
+async def test_memory_tier_is_checked_before_postgres():
+    db = _RecordingSession()
+    cache = RerankerScoreCache(db, MODEL_KEY)
+    reranker_score_cache.put_many([(cache.key("what is bm25", 7), 3.5)])
+
+    await cache.load([("what is bm25", 7), ("what is bm25", 7)])
+
+    assert db.bind_counts == []
+    assert cache.lookup("what is bm25", [7, 8]) == {7: 3.5}
+    assert cache.memory_hits == 1
+
+
+async def test_load_chunks_the_lookup(monkeypatch):
+    monkeypatch.setattr(score_cache_module, "LOAD_CHUNK_KEYS", 100)
+    db = _RecordingSession()
+    cache = RerankerScoreCache(db, MODEL_KEY)
+
+    await cache.load([("query", corpus_id) for corpus_id in range(250)])
+
+    assert len(db.bind_counts) == 3
+    # model_key plus a (query hash, corpus id) pair per key.
+    assert max(db.bind_counts) == 1 + 2 * 100
+    assert db.commits == 0
+
+
+async def test_scores_round_trip_through_postgres(session_factory):
+    async with session_factory() as db:
+        await db.execute(delete(models.RerankerScore).where(models.RerankerScore.model_key == MODEL_KEY))
+        await db.commit()
+
+    async with session_factory() as db:
+        writer = RerankerScoreCache(db, MODEL_KEY)
+        await writer.load([("q1", 1), ("q1", 2)])
+        writer.store("q1", {1: 0.25, 2: -1.5})
+        await writer.flush()
+        # The caller's own transaction is untouched by the flush.
+        await db.rollback()
+
+    reranker_score_cache.clear()
+    async with session_factory() as db:
+        reader = RerankerScoreCache(db, MODEL_KEY)
+        await reader.load([("q1", 1), ("q1", 2), ("q1", 3)])
+        assert reader.lookup("q1", [1, 2, 3]) == {1: 0.25, 2: -1.5}
+        assert reader.stats()["db_hits"] == 2
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import delete, update
+
+pytest.importorskip("torch")
+
+from backend.api.v1.embedding import resume_model  # noqa: E402
+from backend.config import settings  # noqa: E402
+from backend.models import database as models  # noqa: E402
+from backend.models.schemas import EmbeddingResumeRequest  # noqa: E402
+from backend.services.job_queue import JobQueue  # noqa: E402
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def model_id(session_factory):
+    async with session_factory() as db:
+        await db.execute(delete(models.Job))
+        model = models.EmbeddingModel(
+            model_name="sentence-transformers/all-MiniLM-L6-v2",
+            model_source="huggingface",
+            dimension=384,
+            table_name=f"test_vectors_{uuid.uuid4().hex[:12]}",
+            config={},
+            status="error",
+            last_corpus_id=120,
+        )
+        db.add(model)
+        await db.commit()
+    yield model.id
+    async with session_factory() as db:
+        await db.execute(delete(models.Job))
+        await db.execute(delete(models.EmbeddingModel).where(models.EmbeddingModel.id == model.id))
+        await db.commit()
+
+
+async def test_resume_enqueues_a_resume_job(session_factory, model_id):
+    async with session_factory() as db:
+        response = await resume_model(model_id, EmbeddingResumeRequest(), db)
+    assert response["last_corpus_id"] == 120
+    async with session_factory() as db:
+        job = await JobQueue(db).get(response["job_id"])
+    assert job.payload["model_id"] == model_id
+    assert job.payload["resume"] is True
+    assert "api_key" not in job.payload["request"]
+
+
+async def test_resume_refuses_an_api_key_in_the_request(session_factory, model_id):
+    async with session_factory() as db:
+        with pytest.raises(HTTPException) as exc:
+            await resume_model(model_id, EmbeddingResumeRequest(api_key="sk-secret"), db)
+    assert exc.value.status_code == 400
+
+
+async def test_resume_conflicts_with_an_active_job(session_factory, model_id):
+    async with session_factory() as db:
+        first = await resume_model(model_id, EmbeddingResumeRequest(), db)
+    async with session_factory() as db:
+        with pytest.raises(HTTPException) as queued:
+            await resume_model(model_id, EmbeddingResumeRequest(), db)
+    assert queued.value.status_code == 409
+
+    async with session_factory() as db:
+        await JobQueue(db).claim("worker-a")
+    async with session_factory() as db:
+        with pytest.raises(HTTPException) as running:
+            await resume_model(model_id, EmbeddingResumeRequest(), db)
+    assert running.value.status_code == 409
+
+    async with session_factory() as db:
+        await JobQueue(db).finish(first["job_id"], "worker-a", "error", error_message="boom")
+    async with session_factory() as db:
+        second = await resume_model(model_id, EmbeddingResumeRequest(), db)
+    assert second["job_id"] != first["job_id"]
+
+
+async def test_resume_after_cancelling_an_orphaned_job(session_factory, model_id):
+    async with session_factory() as db:
+        first = await resume_model(model_id, EmbeddingResumeRequest(), db)
+    async with session_factory() as db:
+        await JobQueue(db).claim("worker-a")
+    # worker-a dies: its heartbeat goes stale while the job is still running.
+    stale = datetime.utcnow() - timedelta(seconds=settings.job_stale_seconds + 1)
+    async with session_factory() as db:
+        await db.execute(
+            update(models.Job).where(models.Job.id == first["job_id"]).values(heartbeat_at=stale)
+        )
+        await db.commit()
+
+    async with session_factory() as db:
+        cancelled = await JobQueue(db).request_cancel(first["job_id"])
+    assert cancelled.status == "cancelled"
+    async with session_factory() as db:
+        second = await resume_model(model_id, EmbeddingResumeRequest(), db)
+    assert second["job_id"] != first["job_id"]
+
+
+async def test_resume_rejects_a_ready_model(session_factory, model_id):
+    async with session_factory() as db:
+        model = await db.get(models.EmbeddingModel, model_id)
+        model.status = "ready"
+        await db.commit()
+        with pytest.raises(HTTPException) as exc:
+            await resume_model(model_id, EmbeddingResumeRequest(), db)
+    assert exc.value.status_code == 400
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.services.retrieval_service import DEFAULT_EF_SEARCH, MAX_EF_SEARCH, RetrievalService
+
+class _RecordingSession:
+    def __init__(self) -> None:
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        return _EmptyResult()
+
+
+class _EmptyResult:
+    def fetchall(self):
+        return []
+
+
+@pytest.mark.asyncio
+async def test_every_search_sets_ef_search():
+    db = _RecordingSession()
+    service = RetrievalService(db)
+
+    await service.similarity_search("vectors_1", [0.1, 0.2], top_k=5, ef_search=200)
+    await service.similarity_search("vectors_1", [0.1, 0.2], top_k=5)
+
+    settings = [s for s in db.statements if s.startswith("SET LOCAL hnsw.ef_search")]
+    # The second search resets the value instead of inheriting 200.
+    assert settings == [
+        "SET LOCAL hnsw.ef_search = 200",
+        f"SET LOCAL hnsw.ef_search = {DEFAULT_EF_SEARCH}",
+    ]
+
+
+def test_resolve_ef_search_covers_top_k_and_is_capped():
+    service = RetrievalService(None)
+    assert service.resolve_ef_search(10, None) == DEFAULT_EF_SEARCH
+    assert service.resolve_ef_search(120, None) == 120
+    assert service.resolve_ef_search(10, 5000) == MAX_EF_SEARCH
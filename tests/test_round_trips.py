@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+
+from backend.services.vector_backend import PgVectorBackend, _round_trips
+
+
+class _Session:
+    """Just enough of an AsyncSession to hand out a connection that emits events."""
+
+    def __init__(self, connection) -> None:
+        self._connection = connection
+
+    async def connection(self):
+        return SimpleNamespace(sync_connection=self._connection)
+
+
+class _RetrievalService:
+    def __init__(self, connection) -> None:
+        self.connection = connection
+
+    async def similarity_search(self, *args, **kwargs):
+        self.connection.exec_driver_sql("SELECT 1")
+        self.connection.exec_driver_sql("SELECT 1")
+        return []
+
+    async def batch_similarity_search(self, table_name, queries, *args, **kwargs):
+        self.connection.exec_driver_sql("SELECT 1")
+        self.connection.exec_driver_sql("SELECT 1")
+        return [[] for _ in queries]
+
+
+@pytest.mark.asyncio
+async def test_searches_record_their_round_trips():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        model = SimpleNamespace(id=1, table_name="vectors_rt", dimension=4, config={})
+        backend = PgVectorBackend(_Session(connection), model)
+        backend.retrieval_service = _RetrievalService(connection)
+
+        await backend.search([0.1] * 4, top_k=5)
+        await backend.search([0.1] * 4, top_k=5)
+        await backend.batch_search(np.zeros((4, 4), np.float32), top_k=5, with_payload=True)
+
+    # Two statements per single search; one batch of four shares two.
+    assert _round_trips["vectors_rt"] == {"none": (2, 4), "join": (4, 2)}
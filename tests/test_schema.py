@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+
+from backend.core.schema import ADDED_COLUMNS, create_schema
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_added_columns_are_backfilled(session_factory):
+    async with session_factory() as db:
+        connection = await db.connection()
+        # Simulate a database created before the column existed.
+        await connection.execute(text("ALTER TABLE evaluation_runs DROP COLUMN IF EXISTS run_stats"))
+        await create_schema(connection)
+        await create_schema(connection)
+        result = await connection.execute(
+            text(
+                "SELECT table_name, column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema()"
+            )
+        )
+        columns = {(row.table_name, row.column_name) for row in result.all()}
+        await db.commit()
+    assert {(table, column) for table, column, _ in ADDED_COLUMNS} <= columns